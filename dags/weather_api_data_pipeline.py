@@ -9,15 +9,18 @@ from airflow.utils.task_group import TaskGroup
 
 import include.scripts.commons.dag_utils as dag_utils
 from include.scripts.weather.utils import (
-    STATIONS,
-    WEATHER_OBS,
+    TableMetadata,
     extract_stations_data,
     extract_weather_obs_data,
     get_start_param,
+    get_tables_metadata,
     load_extracted_data,
 )
 
 DAG_NAME: str = "weather_api_data_pipeline"
+STATIONS: TableMetadata
+WEATHER_OBS: TableMetadata
+STATIONS, WEATHER_OBS = get_tables_metadata()
 DEFAULT_ARGS: Dict[str, Any] = dag_utils.get_default_args(
     start_date=datetime(2024, 8, 25)
 )
@@ -42,6 +45,7 @@ with DAG(
         load_data: PythonOperator = PythonOperator(
             task_id="load_data",
             python_callable=load_extracted_data,
+            pool=dag_utils.get_duck_db_writer_pool(),
             op_kwargs={"sql_query": f"{{% include  '{STATIONS.sql_path}' %}}"},
         )
 
@@ -69,6 +73,7 @@ with DAG(
         load_data: PythonOperator = PythonOperator(
             task_id="load_data",
             python_callable=load_extracted_data,
+            pool=dag_utils.get_duck_db_writer_pool(),
             op_kwargs={"sql_query": f"{{% include  '{WEATHER_OBS.sql_path}' %}}"},
         )
 
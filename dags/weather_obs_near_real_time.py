@@ -0,0 +1,100 @@
+"""DAG to load new weather obs into Duck DB as soon as they are available."""
+from datetime import datetime
+from typing import Any, Dict
+
+from airflow import DAG
+from airflow.operators.empty import EmptyOperator
+from airflow.operators.python import PythonOperator
+from airflow.utils.task_group import TaskGroup
+
+import include.scripts.commons.dag_utils as dag_utils
+from include.scripts.weather.sensors import WeatherObsSensor
+from include.scripts.weather.utils import (
+    SELECTED_STATION_ID,
+    TableMetadata,
+    extract_stations_data,
+    extract_weather_obs_data,
+    get_start_param,
+    get_tables_metadata,
+    load_extracted_data,
+)
+
+DAG_NAME: str = "weather_obs_near_real_time"
+DEFAULT_ARGS: Dict[str, Any] = dag_utils.get_default_args(
+    start_date=datetime(2024, 8, 25)
+)
+STATIONS: TableMetadata
+WEATHER_OBS: TableMetadata
+STATIONS, WEATHER_OBS = get_tables_metadata()
+
+# A new run starts as soon as the previous one finishes and waits deferred
+# for new data, so it doesn't hold a worker slot meanwhile. Don't enable it
+# together with the weather_api_data_pipeline DAG, both move the same
+# weather_obs_last_date watermark.
+with DAG(
+    dag_id=DAG_NAME,
+    default_args=DEFAULT_ARGS,
+    schedule="@continuous",
+    catchup=False,
+    max_active_runs=1,
+    template_searchpath=dag_utils.get_template_searchpath(),
+) as dag:
+    start: EmptyOperator = EmptyOperator(task_id="start")
+
+    # The compact schema needs the station to be loaded before its weather
+    # obs, so a fresh database gets it in the first run.
+    with TaskGroup(group_id=f"{STATIONS.name}") as station_task_group:
+        extract_data: PythonOperator = PythonOperator(
+            task_id="extract_data",
+            python_callable=extract_stations_data,
+            op_kwargs={"ts": "{{ ts }}"},
+        )
+
+        load_data: PythonOperator = PythonOperator(
+            task_id="load_data",
+            python_callable=load_extracted_data,
+            pool=dag_utils.get_duck_db_writer_pool(),
+            op_kwargs={"sql_query": f"{{% include  '{STATIONS.sql_path}' %}}"},
+        )
+
+        extract_data >> load_data
+
+    with TaskGroup(group_id=f"{WEATHER_OBS.name}") as weather_obs_task_group:
+        start_param: PythonOperator = PythonOperator(
+            task_id="start_param",
+            python_callable=get_start_param,
+            op_kwargs={
+                "start_date": "{{ data_interval_end }}",
+                "last_end_date": "{{ var.value.weather_obs_last_date }}",
+            },
+        )
+
+        wait_data: WeatherObsSensor = WeatherObsSensor(
+            task_id="wait_data",
+            station_id=SELECTED_STATION_ID,
+            start="{{ task_instance.xcom_pull(task_ids='weather_obs.start_param', key='return_value') }}",
+            poll_interval=60,
+            min_batch_size=1,
+        )
+
+        extract_data: PythonOperator = PythonOperator(
+            task_id="extract_data",
+            python_callable=extract_weather_obs_data,
+            op_kwargs={
+                "ts": "{{ ts }}",
+                "start": "{{ task_instance.xcom_pull(task_ids='weather_obs.start_param', key='return_value') }}",
+            },
+        )
+
+        load_data: PythonOperator = PythonOperator(
+            task_id="load_data",
+            python_callable=load_extracted_data,
+            pool=dag_utils.get_duck_db_writer_pool(),
+            op_kwargs={"sql_query": f"{{% include  '{WEATHER_OBS.sql_path}' %}}"},
+        )
+
+        start_param >> wait_data >> extract_data >> load_data
+
+    end = EmptyOperator(task_id="end")
+
+    start >> station_task_group >> weather_obs_task_group >> end
@@ -0,0 +1,34 @@
+"""DAG to keep the Duck DB storage sorted and compacted."""
+from datetime import datetime
+from typing import Any, Dict
+
+from airflow import DAG
+from airflow.operators.empty import EmptyOperator
+from airflow.operators.python import PythonOperator
+
+import include.scripts.commons.dag_utils as dag_utils
+from include.scripts.weather.utils import compact_database
+
+DAG_NAME: str = "weather_storage_maintenance"
+DEFAULT_ARGS: Dict[str, Any] = dag_utils.get_default_args(
+    start_date=datetime(2024, 8, 25)
+)
+
+with DAG(
+    dag_id=DAG_NAME,
+    default_args=DEFAULT_ARGS,
+    schedule_interval="@weekly",
+    catchup=False,
+    max_active_runs=1,
+) as dag:
+    start: EmptyOperator = EmptyOperator(task_id="start")
+
+    compact_data: PythonOperator = PythonOperator(
+        task_id="compact_database",
+        python_callable=compact_database,
+        pool=dag_utils.get_duck_db_writer_pool(),
+    )
+
+    end = EmptyOperator(task_id="end")
+
+    start >> compact_data >> end
@@ -12,6 +12,18 @@ def get_template_searchpath() -> str:
     return "/usr/local/airflow/include"
 
 
+def get_duck_db_writer_pool() -> str:
+    """Get the pool for the tasks that write into the Duck DB.
+
+    The pool has only one slot, DuckDB allows a single writer and
+    `compact_database` replaces the database file.
+
+    Returns:
+        The name of the pool.
+    """
+    return "duck_db_writer"
+
+
 def get_default_args(start_date: datetime) -> Dict[str, Any]:
     """Get default args for DAGs.
 
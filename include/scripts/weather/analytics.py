@@ -0,0 +1,153 @@
+"""Util class to run the analytic queries over the Duck DB with a cache.
+
+This module doesn't depend on Airflow so it can be used from notebooks
+or dashboards.
+"""
+import logging
+import os
+import threading
+from collections import OrderedDict
+from datetime import date
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+import duckdb
+import pandas as pd
+
+
+def get_version_path(database: str) -> str:
+    """Get the path of the file that stores the load version of a database.
+
+    Args:
+        `database`: Path of the DuckDB database.
+
+    Returns:
+        The path of the version file next to the database.
+    """
+    return f"{database}.version"
+
+
+def get_load_version(database: str) -> int:
+    """Get the load version of a database.
+
+    Args:
+        `database`: Path of the DuckDB database.
+
+    Returns:
+        The number of loads committed into the database, 0 when
+        nothing has been loaded yet.
+    """
+    try:
+        with open(get_version_path(database)) as file:
+            return int(file.read())
+    except (FileNotFoundError, ValueError):
+        return 0
+
+
+def bump_load_version(database: str) -> int:
+    """Increase the load version of a database.
+
+    It must be called after each load is committed, while the write
+    connection is still open so loads can't bump it concurrently.
+
+    Args:
+        `database`: Path of the DuckDB database.
+
+    Returns:
+        The new load version.
+    """
+    version: int = get_load_version(database) + 1
+    version_path: str = get_version_path(database)
+    with open(f"{version_path}.tmp", "w") as file:
+        file.write(str(version))
+    os.replace(f"{version_path}.tmp", version_path)
+    return version
+
+
+class AnalyticsClient:
+    """Class to run the analytic queries with a LRU cache of the results.
+
+    The results are cached by query, params, current date (the queries
+    filter by `current_date()`) and load version of the database, so they
+    are reused until a new load is committed. The database is opened in
+    read-only mode only on cache misses, a connection kept open would hold
+    the DuckDB file lock and block the loads of the pipeline.
+    """
+
+    def __init__(
+        self,
+        database: str,
+        sql_folder: str = "include/sql/weather",
+        cache_size: int = 128,
+    ) -> None:
+        """Init the client.
+
+        Args:
+            `database`: Path of the DuckDB database.
+            `sql_folder`: Folder with the analytic queries, use
+                `include/sql/weather/compact` for the compact schema.
+            `cache_size`: Max number of results to keep in the cache.
+        """
+        self.database: str = database
+        self.sql_folder: str = sql_folder
+        self.cache_size: int = cache_size
+        self._cache: "OrderedDict[Tuple[Hashable, ...], pd.DataFrame]" = OrderedDict()
+        self._lock: threading.Lock = threading.Lock()
+
+    def run_query(
+        self, sql_path: str, params: Optional[Dict[str, Any]] = None
+    ) -> pd.DataFrame:
+        """Run a query or get its result from the cache.
+
+        Args:
+            `sql_path`: Path of the file that contains the query.
+            `params`: Named params for the query, e.g. `$station_id`.
+
+        Returns:
+            The result of the query.
+        """
+        key: Tuple[Hashable, ...] = (
+            sql_path,
+            tuple(sorted((params or {}).items())),
+            date.today(),
+            get_load_version(self.database),
+        )
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key].copy()
+
+        with open(sql_path) as file:
+            sql_query: str = file.read()
+        logging.info(f"Executing query: \n {sql_query}")
+        with duckdb.connect(self.database, read_only=True) as con:
+            result: pd.DataFrame = con.execute(sql_query, params).df()
+
+        with self._lock:
+            self._cache[key] = result
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return result.copy()
+
+    def avg_temp_last_week(self) -> pd.DataFrame:
+        """Get the average temperature of the last 7 days by station.
+
+        Returns:
+            The result of the query.
+        """
+        return self.run_query(os.path.join(self.sql_folder, "avg_temp_last_week.sql"))
+
+    def max_wind_change_last_week(self) -> pd.DataFrame:
+        """Get the maximum wind speed change of the last 7 days by station.
+
+        Returns:
+            The result of the query.
+        """
+        return self.run_query(
+            os.path.join(self.sql_folder, "max_wind_change_last_week.sql")
+        )
+
+    def clear_cache(self) -> None:
+        """Remove every result from the cache."""
+        with self._lock:
+            self._cache.clear()
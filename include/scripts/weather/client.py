@@ -1,11 +1,25 @@
 """Util class to interact with Weather API and retrieve data."""
 import logging
+import os
+import time
 from enum import Enum
-from typing import Any, Dict, Optional
+from http import HTTPStatus
+from typing import Any, Dict, Optional, Tuple
 
 import requests
 from requests import Response
 
+from include.scripts.weather.rate_controller import (
+    RateController,
+    RequestSlot,
+    get_rate_controller,
+)
+
+# SQLite file used to share the rate controller between Airflow workers.
+RATE_CONTROLLER_STATE_PATH: Optional[str] = os.getenv(
+    "WEATHER_API_RATE_CONTROLLER_STATE_PATH"
+)
+
 
 class WeatherEndpoints(Enum):
     """Weather Endpoints."""
@@ -22,6 +36,23 @@ class WeatherClient:
     """
 
     __BASE_URL: str = "https://api.weather.gov"
+    __MAX_THROTTLED_RETRIES: int = 5
+    # Seconds to connect and to wait for the response, so a hung request
+    # doesn't block the thread (and its rate controller slot) forever.
+    __TIMEOUT: Tuple[float, float] = (10.0, 30.0)
+
+    def __init__(self, rate_controller: Optional[RateController] = None) -> None:
+        """Init the client.
+
+        Args:
+            `rate_controller`: Controller that limits the requests in flight.
+                By default it uses the controller shared by the process,
+                which is also shared between workers when the env var
+                `WEATHER_API_RATE_CONTROLLER_STATE_PATH` is set.
+        """
+        self.rate_controller: RateController = rate_controller or (
+            get_rate_controller(state_path=RATE_CONTROLLER_STATE_PATH)
+        )
 
     def make_request(
         self,
@@ -41,6 +72,52 @@ class WeatherClient:
         Returns:
             The data obtained from the request.
         """
+        response: Response = self.__get(
+            endpoint=endpoint, params=params, headers=headers
+        )
+        data: Dict[str, Any] = response.json()
+        print(data)
+        return data
+
+    def make_raw_request(
+        self,
+        endpoint: str,
+        params: Optional[Dict[str, Any]] = None,
+        headers: Dict[str, str] = {"accept": "application/geo+json"},
+    ) -> bytes:
+        """Make a GET request to the Weather API without decoding the response.
+
+        Args:
+            `endpoint`: Endpoint for the API.
+            `params`: Params for the API.
+            `headers`: Headers for the API. By default it is:
+                `application/geo+json` which was obtained from
+                the website.
+
+        Returns:
+            The raw body of the response, so it can be decoded elsewhere.
+        """
+        response: Response = self.__get(
+            endpoint=endpoint, params=params, headers=headers
+        )
+        return response.content
+
+    def __get(
+        self,
+        endpoint: str,
+        params: Optional[Dict[str, Any]],
+        headers: Dict[str, str],
+    ) -> Response:
+        """Make a GET request retrying it when the API throttles the client.
+
+        Args:
+            `endpoint`: Endpoint for the API.
+            `params`: Params for the API.
+            `headers`: Headers for the API.
+
+        Returns:
+            The successful response.
+        """
         url: str = f"{self.__BASE_URL}/{endpoint}"
 
         logging.info(
@@ -49,11 +126,43 @@ class WeatherClient:
             + f"- headers: {headers}\n"
         )
 
-        response: Response = requests.get(url=url, params=params, headers=headers)
+        response: Response
+        for attempt in range(self.__MAX_THROTTLED_RETRIES + 1):
+            request_slot: RequestSlot
+            with self.rate_controller.slot() as request_slot:
+                response = requests.get(
+                    url=url, params=params, headers=headers, timeout=self.__TIMEOUT
+                )
+                # Time until the headers, so the size of the body doesn't
+                # count as congestion.
+                request_slot.latency = response.elapsed.total_seconds()
+                if response.status_code == HTTPStatus.TOO_MANY_REQUESTS:
+                    request_slot.throttled()
+
+            if not request_slot.is_throttled or attempt == self.__MAX_THROTTLED_RETRIES:
+                break
+            retry_after: float = self.get_retry_after(response, attempt)
+            logging.warning(f"Throttled by the API, retrying in {retry_after}s.")
+            time.sleep(retry_after)
+
         response.raise_for_status()
 
         logging.info("Done :)")
+        return response
 
-        data: Dict[str, Any] = response.json()
-        print(data)
-        return data
+    @staticmethod
+    def get_retry_after(response: Response, attempt: int) -> float:
+        """Get the seconds to wait before retrying a throttled request.
+
+        Args:
+            `response`: The throttled response.
+            `attempt`: Number of the attempt that was throttled, starting at 0.
+
+        Returns:
+            The `Retry-After` header when it is present in seconds,
+            otherwise an exponential backoff.
+        """
+        retry_after: Optional[str] = response.headers.get("Retry-After")
+        if retry_after is not None and retry_after.isdigit():
+            return float(retry_after)
+        return float(2**attempt)
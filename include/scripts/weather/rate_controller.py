@@ -0,0 +1,378 @@
+"""Adaptive concurrency controller for the Weather API requests.
+
+The controller follows an AIMD (additive increase, multiplicative decrease)
+policy over the number of requests allowed in flight:
+* Every healthy response increases the limit a fraction of a slot, so the
+  limit grows roughly by `increase_step` each time a full window completes.
+* A `429` response or a latency well above the observed baseline (more than
+  `latency_tolerance` times and `latency_slack` seconds) cuts the limit by
+  `decrease_factor`, at most once per window: the signals of requests
+  acquired before the last cut are ignored, they were already in flight
+  when the API got congested and would cut the limit again for the same
+  congestion.
+
+The state lives in memory and is shared by every `WeatherClient` of the
+process that uses the same controller name. When a `state_path` is given
+the state is stored in a SQLite file instead, so several Airflow workers on
+the same host share one limit.
+"""
+import logging
+import math
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple, Union
+
+DEFAULT_CONTROLLER_NAME: str = "weather_api"
+
+
+class RateLimits(NamedTuple):
+    """Tuning parameters of the rate controller."""
+
+    min_limit: float = 1.0
+    max_limit: float = 32.0
+    initial_limit: float = 2.0
+    increase_step: float = 1.0
+    decrease_factor: float = 0.5
+    latency_tolerance: float = 2.0
+    latency_slack: float = 0.05
+    baseline_decay: float = 0.05
+    lease_timeout: float = 300.0
+    poll_interval: float = 0.05
+
+
+class RateState(NamedTuple):
+    """Current state of the rate controller."""
+
+    limit: float
+    in_flight: int
+    baseline_latency: Optional[float]
+    last_decrease: Optional[float] = None
+
+
+def next_state(
+    limit: float,
+    baseline_latency: Optional[float],
+    latency: float,
+    throttled: bool,
+    limits: RateLimits,
+    acquired_at: Optional[float] = None,
+    released_at: Optional[float] = None,
+    last_decrease: Optional[float] = None,
+) -> RateState:
+    """Compute the new limit and baseline after a request finished.
+
+    Args:
+        `limit`: Current concurrency limit.
+        `baseline_latency`: Lowest latency observed so far (slowly decayed
+            towards recent latencies), `None` before the first request.
+        `latency`: Latency of the finished request in seconds.
+        `throttled`: Whether the API answered with a `429`.
+        `limits`: Tuning parameters of the controller.
+        `acquired_at`: Epoch time when the request acquired its slot.
+        `released_at`: Epoch time when the request finished, by default now.
+        `last_decrease`: Epoch time of the last cut of the limit, `None`
+            before the first one.
+
+    Returns:
+        The new state, `in_flight` is always 0 because it is not
+        tracked by this function.
+    """
+    if baseline_latency is None or latency < baseline_latency:
+        baseline_latency = latency
+    else:
+        baseline_latency += limits.baseline_decay * (latency - baseline_latency)
+
+    congested: bool = (
+        latency > limits.latency_tolerance * baseline_latency
+        and latency - baseline_latency > limits.latency_slack
+    )
+    # Requests acquired before the last cut were sent with the old limit.
+    already_decreased: bool = (
+        acquired_at is not None
+        and last_decrease is not None
+        and acquired_at < last_decrease
+    )
+    if throttled or congested:
+        if not already_decreased:
+            limit = limit * limits.decrease_factor
+            last_decrease = released_at if released_at is not None else time.time()
+    else:
+        limit = limit + limits.increase_step / limit
+
+    limit = min(max(limit, limits.min_limit), limits.max_limit)
+    return RateState(
+        limit=limit,
+        in_flight=0,
+        baseline_latency=baseline_latency,
+        last_decrease=last_decrease,
+    )
+
+
+class _MemoryBackend:
+    """Process local state protected by a lock."""
+
+    def __init__(self, limits: RateLimits) -> None:
+        self._limits: RateLimits = limits
+        self._lock: threading.Lock = threading.Lock()
+        self._limit: float = limits.initial_limit
+        self._baseline_latency: Optional[float] = None
+        self._last_decrease: Optional[float] = None
+        # Acquire time of the requests in flight by token.
+        self._leases: Dict[str, float] = {}
+
+    def try_acquire(self) -> Optional[str]:
+        with self._lock:
+            if len(self._leases) >= math.floor(self._limit):
+                return None
+            token: str = uuid.uuid4().hex
+            self._leases[token] = time.time()
+            return token
+
+    def release(self, token: str, latency: float, throttled: bool) -> None:
+        with self._lock:
+            state: RateState = next_state(
+                limit=self._limit,
+                baseline_latency=self._baseline_latency,
+                latency=latency,
+                throttled=throttled,
+                limits=self._limits,
+                acquired_at=self._leases.pop(token, None),
+                last_decrease=self._last_decrease,
+            )
+            self._limit = state.limit
+            self._baseline_latency = state.baseline_latency
+            self._last_decrease = state.last_decrease
+
+    def state(self) -> RateState:
+        with self._lock:
+            return RateState(
+                limit=self._limit,
+                in_flight=len(self._leases),
+                baseline_latency=self._baseline_latency,
+                last_decrease=self._last_decrease,
+            )
+
+
+class _SqliteBackend:
+    """State stored in a SQLite file shared by several processes.
+
+    Every request in flight holds a lease row, leases older than
+    `lease_timeout` are purged so a crashed worker can't keep its slots.
+    """
+
+    def __init__(self, name: str, path: str, limits: RateLimits) -> None:
+        self._name: str = name
+        self._path: str = path
+        self._limits: RateLimits = limits
+        with self._transaction() as con:
+            con.execute(
+                "CREATE TABLE IF NOT EXISTS rate_controller ("
+                "name TEXT PRIMARY KEY, rate_limit REAL, baseline_latency REAL, "
+                "last_decrease REAL)"
+            )
+            # State files created before the last_decrease column.
+            columns: List[str] = [
+                row[1] for row in con.execute("PRAGMA table_info(rate_controller)")
+            ]
+            if "last_decrease" not in columns:
+                con.execute("ALTER TABLE rate_controller ADD COLUMN last_decrease REAL")
+            con.execute(
+                "CREATE TABLE IF NOT EXISTS rate_controller_leases ("
+                "name TEXT, token TEXT PRIMARY KEY, acquired_at REAL)"
+            )
+            con.execute(
+                "INSERT OR IGNORE INTO rate_controller VALUES (?, ?, NULL, NULL)",
+                (name, limits.initial_limit),
+            )
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        con: sqlite3.Connection = self._connect()
+        try:
+            con.execute("BEGIN IMMEDIATE")
+            yield con
+            con.execute("COMMIT")
+        except BaseException:
+            con.execute("ROLLBACK")
+            raise
+        finally:
+            con.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self._path, timeout=30, isolation_level=None)
+
+    def _read(self, con: sqlite3.Connection) -> RateState:
+        con.execute(
+            "DELETE FROM rate_controller_leases WHERE name = ? AND acquired_at < ?",
+            (self._name, time.time() - self._limits.lease_timeout),
+        )
+        limit, baseline_latency, last_decrease = con.execute(
+            "SELECT rate_limit, baseline_latency, last_decrease "
+            "FROM rate_controller WHERE name = ?",
+            (self._name,),
+        ).fetchone()
+        (in_flight,) = con.execute(
+            "SELECT COUNT(*) FROM rate_controller_leases WHERE name = ?",
+            (self._name,),
+        ).fetchone()
+        return RateState(
+            limit=limit,
+            in_flight=in_flight,
+            baseline_latency=baseline_latency,
+            last_decrease=last_decrease,
+        )
+
+    def try_acquire(self) -> Optional[str]:
+        with self._transaction() as con:
+            state: RateState = self._read(con)
+            if state.in_flight >= math.floor(state.limit):
+                return None
+            token: str = uuid.uuid4().hex
+            con.execute(
+                "INSERT INTO rate_controller_leases VALUES (?, ?, ?)",
+                (self._name, token, time.time()),
+            )
+            return token
+
+    def release(self, token: str, latency: float, throttled: bool) -> None:
+        with self._transaction() as con:
+            lease: Optional[Tuple[float]] = con.execute(
+                "SELECT acquired_at FROM rate_controller_leases WHERE token = ?",
+                (token,),
+            ).fetchone()
+            con.execute("DELETE FROM rate_controller_leases WHERE token = ?", (token,))
+            current: RateState = self._read(con)
+            state: RateState = next_state(
+                limit=current.limit,
+                baseline_latency=current.baseline_latency,
+                latency=latency,
+                throttled=throttled,
+                limits=self._limits,
+                acquired_at=lease[0] if lease is not None else None,
+                last_decrease=current.last_decrease,
+            )
+            con.execute(
+                "UPDATE rate_controller SET rate_limit = ?, baseline_latency = ?, "
+                "last_decrease = ? WHERE name = ?",
+                (state.limit, state.baseline_latency, state.last_decrease, self._name),
+            )
+
+    def state(self) -> RateState:
+        with self._transaction() as con:
+            return self._read(con)
+
+
+class RateController:
+    """Adaptive limit of concurrent requests against an API.
+
+    Use `get_rate_controller` to obtain the controller shared by the process
+    instead of instantiating this class directly.
+    """
+
+    def __init__(
+        self,
+        name: str = DEFAULT_CONTROLLER_NAME,
+        state_path: Optional[str] = None,
+        limits: Optional[RateLimits] = None,
+    ) -> None:
+        """Init the controller.
+
+        Args:
+            `name`: Name of the controller, it identifies the shared state.
+            `state_path`: Optional SQLite file to share the state between
+                processes. By default the state is kept in memory.
+            `limits`: Tuning parameters of the controller, by default
+                `RateLimits()`.
+        """
+        self.name: str = name
+        self.limits: RateLimits = limits or RateLimits()
+        self._backend: Union[_SqliteBackend, _MemoryBackend] = (
+            _SqliteBackend(name=name, path=state_path, limits=self.limits)
+            if state_path
+            else _MemoryBackend(limits=self.limits)
+        )
+
+    @contextmanager
+    def slot(self) -> Iterator["RequestSlot"]:
+        """Wait for a free slot and hold it while the request is running.
+
+        The latency is reported to the controller on exit. Set
+        `RequestSlot.latency` inside the block with the time until the
+        response headers, otherwise the duration of the whole block is
+        used, which includes downloading the body and would make large
+        responses look like congestion. Call `RequestSlot.throttled` inside
+        the block when the API answered with a `429`.
+
+        Yields:
+            The slot acquired for the request.
+        """
+        token: Optional[str] = self._backend.try_acquire()
+        while token is None:
+            time.sleep(self.limits.poll_interval)
+            token = self._backend.try_acquire()
+
+        request_slot: RequestSlot = RequestSlot()
+        start: float = time.monotonic()
+        try:
+            yield request_slot
+        finally:
+            latency: float = (
+                request_slot.latency
+                if request_slot.latency is not None
+                else time.monotonic() - start
+            )
+            self._backend.release(
+                token=token, latency=latency, throttled=request_slot.is_throttled
+            )
+            if request_slot.is_throttled:
+                logging.warning(
+                    f"Rate controller {self.name} throttled, "
+                    f"new limit: {self.state().limit:.2f}"
+                )
+
+    def state(self) -> RateState:
+        """Get the current state of the controller.
+
+        Returns:
+            The current limit, requests in flight and latency baseline.
+        """
+        return self._backend.state()
+
+
+class RequestSlot:
+    """Slot held by a request while it is in flight."""
+
+    def __init__(self) -> None:
+        """Init the slot."""
+        self.is_throttled: bool = False
+        self.latency: Optional[float] = None
+
+    def throttled(self) -> None:
+        """Mark the request as throttled by the API."""
+        self.is_throttled = True
+
+
+_CONTROLLERS: Dict[str, RateController] = {}
+_CONTROLLERS_LOCK: threading.Lock = threading.Lock()
+
+
+def get_rate_controller(
+    name: str = DEFAULT_CONTROLLER_NAME, state_path: Optional[str] = None
+) -> RateController:
+    """Get the rate controller shared by the process.
+
+    Args:
+        `name`: Name of the controller.
+        `state_path`: Optional SQLite file to share the state between
+            processes. Only used the first time the controller is created.
+
+    Returns:
+        The same controller for every call with the same name.
+    """
+    with _CONTROLLERS_LOCK:
+        if name not in _CONTROLLERS:
+            _CONTROLLERS[name] = RateController(name=name, state_path=state_path)
+        return _CONTROLLERS[name]
@@ -0,0 +1,92 @@
+"""Sensors to wait for new data of the Weather API."""
+from datetime import timedelta
+from typing import Any, Dict, Optional, Sequence
+
+from airflow.exceptions import AirflowException
+from airflow.sensors.base import BaseSensorOperator
+from airflow.utils.context import Context
+
+from include.scripts.weather.triggers import WeatherObsTrigger
+
+
+class WeatherObsSensor(BaseSensorOperator):
+    """Wait until a station has a batch of new observations worth loading.
+
+    It is always deferrable: the worker slot is released while the
+    `WeatherObsTrigger` polls the endpoint in the triggerer, and the task
+    only resumes on a worker when the batch is available.
+    """
+
+    template_fields: Sequence[str] = ("station_id", "start")
+
+    def __init__(
+        self,
+        *,
+        station_id: str,
+        start: str,
+        poll_interval: float = 60.0,
+        min_batch_size: int = 1,
+        max_batch_wait: Optional[float] = None,
+        max_consecutive_failures: int = 5,
+        **kwargs: Any,
+    ) -> None:
+        """Init the sensor.
+
+        Args:
+            `station_id`: Id of the station to poll.
+            `start`: Watermark, only observations from this date are counted.
+            `poll_interval`: Seconds between polls.
+            `min_batch_size`: Number of new observations worth loading.
+            `max_batch_wait`: Seconds after which any new observation is
+                worth loading, even if there are less than `min_batch_size`.
+            `max_consecutive_failures`: Number of polls in a row that can fail
+                before the sensor fails.
+            `kwargs`: Args for `BaseSensorOperator`.
+        """
+        super().__init__(**kwargs)
+        self.station_id: str = station_id
+        self.start: str = start
+        self.poll_interval: float = poll_interval
+        self.min_batch_size: int = min_batch_size
+        self.max_batch_wait: Optional[float] = max_batch_wait
+        self.max_consecutive_failures: int = max_consecutive_failures
+
+    def execute(self, context: Context) -> None:
+        """Defer the task to the triggerer.
+
+        Args:
+            `context`: The task context.
+        """
+        self.defer(
+            trigger=WeatherObsTrigger(
+                station_id=self.station_id,
+                start=self.start,
+                poll_interval=self.poll_interval,
+                min_batch_size=self.min_batch_size,
+                max_batch_wait=self.max_batch_wait,
+                max_consecutive_failures=self.max_consecutive_failures,
+            ),
+            method_name="execute_complete",
+            timeout=timedelta(seconds=self.timeout),
+        )
+
+    def execute_complete(
+        self, context: Context, event: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Resume the task when the trigger finds a batch.
+
+        Args:
+            `context`: The task context.
+            `event`: The event sent by the trigger.
+
+        Returns:
+            The event, with the number of new observations and the
+            last observation timestamp.
+        """
+        if event["status"] != "success":
+            raise AirflowException(f"Polling failed: {event['message']}")
+        self.log.info(
+            f"{event['count']} new observations until "
+            f"{event['last_observation_timestamp']}."
+        )
+        return event
@@ -0,0 +1,360 @@
+"""Spatial index over the stations to select them by location.
+
+The stations are bucketed in a grid of `cell_size` degrees, with coarser
+levels on top of it, so a lookup only visits the occupied cells around the
+point or the cells inside the bounding box. The
+index is built from the Duck DB and reused until a new load is committed.
+This module doesn't depend on Airflow.
+"""
+import heapq
+import math
+import os
+import threading
+from collections import defaultdict
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+import duckdb
+
+from include.scripts.weather.analytics import get_load_version
+
+EARTH_RADIUS_KM: float = 6371.0088
+
+
+class StationLocation(NamedTuple):
+    """Location of a station."""
+
+    station_id: str
+    latitude: float
+    longitude: float
+
+
+class BoundingBox(NamedTuple):
+    """Bounding box in degrees.
+
+    When `min_longitude > max_longitude` the box crosses the antimeridian.
+    """
+
+    min_latitude: float
+    min_longitude: float
+    max_latitude: float
+    max_longitude: float
+
+
+def get_distance_km(
+    latitude_1: float, longitude_1: float, latitude_2: float, longitude_2: float
+) -> float:
+    """Get the great-circle distance between two points.
+
+    Args:
+        `latitude_1`: Latitude of the first point in degrees.
+        `longitude_1`: Longitude of the first point in degrees.
+        `latitude_2`: Latitude of the second point in degrees.
+        `longitude_2`: Longitude of the second point in degrees.
+
+    Returns:
+        The haversine distance in kilometers.
+    """
+    phi_1: float = math.radians(latitude_1)
+    phi_2: float = math.radians(latitude_2)
+    haversine: float = (
+        math.sin((phi_2 - phi_1) / 2) ** 2
+        + math.cos(phi_1)
+        * math.cos(phi_2)
+        * math.sin(math.radians(longitude_2 - longitude_1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(haversine)))
+
+
+class StationsIndex:
+    """Grid index over the locations of the stations."""
+
+    COARSE_LEVELS: int = 2
+    LEVEL_FACTOR: int = 8
+
+    def __init__(self, stations: Iterable[StationLocation], cell_size: float = 0.5):
+        """Build the index.
+
+        Args:
+            `stations`: Locations of the stations to index.
+            `cell_size`: Size of the grid cells in degrees.
+        """
+        self.cell_size: float = cell_size
+        self.rows: int = math.ceil(180 / cell_size)
+        self.columns: int = math.ceil(360 / cell_size)
+        self.stations: List[StationLocation] = list(stations)
+        self._cells: Dict[Tuple[int, int], List[StationLocation]] = defaultdict(list)
+        for station in self.stations:
+            self._cells[self._get_cell(station.latitude, station.longitude)].append(
+                station
+            )
+        # Coarser levels of the grid, each cell maps to its occupied children.
+        self._levels: List[Dict[Tuple[int, int], Set[Tuple[int, int]]]] = [
+            {cell: set() for cell in self._cells}
+        ]
+        for _ in range(self.COARSE_LEVELS):
+            level: Dict[Tuple[int, int], Set[Tuple[int, int]]] = defaultdict(set)
+            for row, column in self._levels[-1]:
+                level[(row // self.LEVEL_FACTOR, column // self.LEVEL_FACTOR)].add(
+                    (row, column)
+                )
+            self._levels.append(dict(level))
+
+    @classmethod
+    def from_database(
+        cls,
+        database: str,
+        sql_folder: str = "include/sql/weather",
+        cell_size: float = 0.5,
+    ) -> "StationsIndex":
+        """Build the index with the stations stored in the database.
+
+        Args:
+            `database`: Path of the DuckDB database.
+            `sql_folder`: Folder with the `stations_locations.sql` query, use
+                `include/sql/weather/compact` for the compact schema.
+            `cell_size`: Size of the grid cells in degrees.
+
+        Returns:
+            The index of the stations.
+        """
+        with open(os.path.join(sql_folder, "stations_locations.sql")) as file:
+            sql_query: str = file.read()
+        with duckdb.connect(database, read_only=True) as con:
+            rows: List[Tuple[str, float, float]] = con.execute(sql_query).fetchall()
+        return cls(
+            stations=[StationLocation(*row) for row in rows], cell_size=cell_size
+        )
+
+    def nearest(self, latitude: float, longitude: float, n: int = 1) -> List[str]:
+        """Get the nearest stations to a point.
+
+        The cells are visited best-first by their minimum distance to the
+        point, starting from the coarsest level, until no unvisited cell can
+        hold a station closer than the n-th found. Only occupied cells are
+        visited, so far points don't walk the empty cells around them.
+
+        Args:
+            `latitude`: Latitude of the point in degrees.
+            `longitude`: Longitude of the point in degrees.
+            `n`: Number of stations to get.
+
+        Returns:
+            The ids of the stations sorted by distance.
+        """
+        n = min(n, len(self.stations))
+        if n <= 0:
+            return []
+
+        top_level: int = len(self._levels) - 1
+        queue: List[Tuple[float, int, Tuple[int, int]]] = [
+            (
+                self._get_min_distance_to_cell(latitude, longitude, top_level, cell),
+                top_level,
+                cell,
+            )
+            for cell in self._levels[top_level]
+        ]
+        heapq.heapify(queue)
+        # Max heap of the n nearest stations found so far.
+        candidates: List[Tuple[float, str]] = []
+        while queue:
+            min_distance: float
+            level: int
+            cell: Tuple[int, int]
+            min_distance, level, cell = heapq.heappop(queue)
+            if len(candidates) == n and min_distance > -candidates[0][0]:
+                break
+            if level > 0:
+                for child in self._levels[level][cell]:
+                    heapq.heappush(
+                        queue,
+                        (
+                            self._get_min_distance_to_cell(
+                                latitude, longitude, level - 1, child
+                            ),
+                            level - 1,
+                            child,
+                        ),
+                    )
+                continue
+            for station in self._cells[cell]:
+                distance: float = get_distance_km(
+                    latitude, longitude, station.latitude, station.longitude
+                )
+                if len(candidates) < n:
+                    heapq.heappush(candidates, (-distance, station.station_id))
+                elif distance < -candidates[0][0]:
+                    heapq.heapreplace(candidates, (-distance, station.station_id))
+
+        return [
+            station_id
+            for _, station_id in sorted(
+                (-distance, station_id) for distance, station_id in candidates
+            )
+        ]
+
+    def within_bbox(self, bbox: BoundingBox) -> List[str]:
+        """Get the stations inside a bounding box.
+
+        Args:
+            `bbox`: The bounding box in degrees.
+
+        Returns:
+            The ids of the stations inside the bounding box.
+        """
+        min_row: int = self._get_cell(bbox.min_latitude, 0)[0]
+        max_row: int = self._get_cell(bbox.max_latitude, 0)[0]
+        min_column: int = min(
+            int((bbox.min_longitude + 180) // self.cell_size), self.columns - 1
+        )
+        max_column: int = min(
+            int((bbox.max_longitude + 180) // self.cell_size), self.columns - 1
+        )
+        crosses_antimeridian: bool = bbox.min_longitude > bbox.max_longitude
+        if crosses_antimeridian:
+            max_column += self.columns
+
+        station_ids: List[str] = []
+        for row in range(min_row, max_row + 1):
+            for column in range(min_column, max_column + 1):
+                for station in self._cells.get((row, column % self.columns), []):
+                    inside_longitude: bool = (
+                        station.longitude >= bbox.min_longitude
+                        or station.longitude <= bbox.max_longitude
+                        if crosses_antimeridian
+                        else bbox.min_longitude
+                        <= station.longitude
+                        <= bbox.max_longitude
+                    )
+                    if (
+                        inside_longitude
+                        and bbox.min_latitude <= station.latitude <= bbox.max_latitude
+                    ):
+                        station_ids.append(station.station_id)
+        return station_ids
+
+    def _get_cell(self, latitude: float, longitude: float) -> Tuple[int, int]:
+        row: int = min(int((latitude + 90) // self.cell_size), self.rows - 1)
+        column: int = int(((longitude + 180) % 360) // self.cell_size)
+        return max(row, 0), column % self.columns
+
+    def _get_min_distance_to_cell(
+        self, latitude: float, longitude: float, level: int, cell: Tuple[int, int]
+    ) -> float:
+        """Lower bound of the distance from the point to any station of a cell.
+
+        Args:
+            `latitude`: Latitude of the point in degrees.
+            `longitude`: Longitude of the point in degrees.
+            `level`: Level of the cell, 0 is the finest.
+            `cell`: Row and column of the cell in its level.
+
+        Returns:
+            The distance in kilometers to the closest point of the cell.
+        """
+        size: float = self.cell_size * self.LEVEL_FACTOR**level
+        min_latitude: float = cell[0] * size - 90
+        max_latitude: float = min(min_latitude + size, 90)
+        min_longitude: float = cell[1] * size - 180
+        max_longitude: float = min(min_longitude + size, 180)
+
+        if (longitude - min_longitude) % 360 <= max_longitude - min_longitude:
+            if min_latitude <= latitude <= max_latitude:
+                return 0.0
+            return (
+                math.radians(
+                    min(abs(latitude - min_latitude), abs(latitude - max_latitude))
+                )
+                * EARTH_RADIUS_KM
+            )
+
+        # Out of its longitudes, the closest point of the cell is on its
+        # nearest meridian edge. Up to 90 degrees of longitude the distance
+        # grows away from the foot of the perpendicular to that meridian, so
+        # the foot is clamped to the latitudes of the cell. Past 90 degrees it
+        # peaks inside the meridian, so the closest point is a corner.
+        to_west_edge: float = (min_longitude - longitude) % 360
+        to_east_edge: float = (longitude - max_longitude) % 360
+        edge_longitude: float = (
+            min_longitude if to_west_edge < to_east_edge else max_longitude
+        )
+        longitude_gap: float = min(to_west_edge, to_east_edge)
+        if longitude_gap >= 90:
+            return min(
+                get_distance_km(latitude, longitude, min_latitude, edge_longitude),
+                get_distance_km(latitude, longitude, max_latitude, edge_longitude),
+            )
+        foot_latitude: float = math.degrees(
+            math.atan(
+                math.tan(math.radians(latitude)) / math.cos(math.radians(longitude_gap))
+            )
+        )
+        return get_distance_km(
+            latitude,
+            longitude,
+            min(max(foot_latitude, min_latitude), max_latitude),
+            edge_longitude,
+        )
+
+
+_INDEXES: Dict[Tuple[str, str], Tuple[int, StationsIndex]] = {}
+_INDEXES_LOCK: threading.Lock = threading.Lock()
+
+
+def get_stations_index(
+    database: str, sql_folder: str = "include/sql/weather"
+) -> StationsIndex:
+    """Get the index of the stations, rebuilt only after a new load.
+
+    Args:
+        `database`: Path of the DuckDB database.
+        `sql_folder`: Folder with the `stations_locations.sql` query, use
+            `include/sql/weather/compact` for the compact schema.
+
+    Returns:
+        The index of the stations for the current load version.
+    """
+    version: int = get_load_version(database)
+    with _INDEXES_LOCK:
+        cached: Optional[Tuple[int, StationsIndex]] = _INDEXES.get(
+            (database, sql_folder)
+        )
+        if cached is None or cached[0] != version:
+            cached = (
+                version,
+                StationsIndex.from_database(database=database, sql_folder=sql_folder),
+            )
+            _INDEXES[(database, sql_folder)] = cached
+        return cached[1]
+
+
+def resolve_station_ids(
+    database: str,
+    sql_folder: str = "include/sql/weather",
+    near: Optional[Tuple[float, float]] = None,
+    n: int = 1,
+    bbox: Optional[BoundingBox] = None,
+) -> List[str]:
+    """Resolve the stations to extract by their location.
+
+    Args:
+        `database`: Path of the DuckDB database.
+        `sql_folder`: Folder with the `stations_locations.sql` query.
+        `near`: Point as (latitude, longitude), selects its `n` nearest
+            stations.
+        `n`: Number of stations to select near the point.
+        `bbox`: Selects every station inside this bounding box.
+
+    Returns:
+        The ids of the selected stations.
+    """
+    if (near is None) == (bbox is None):
+        raise ValueError("Use exactly one of the arguments near or bbox.")
+
+    stations_index: StationsIndex = get_stations_index(
+        database=database, sql_folder=sql_folder
+    )
+    if bbox is None:
+        assert near is not None
+        return stations_index.nearest(latitude=near[0], longitude=near[1], n=n)
+    return stations_index.within_bbox(bbox)
@@ -0,0 +1,142 @@
+"""Triggers to wait for new data of the Weather API in the Airflow triggerer."""
+import asyncio
+import json
+import os
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from airflow.triggers.base import BaseTrigger, TriggerEvent
+
+from include.scripts.weather.client import WeatherClient, WeatherEndpoints
+
+
+class WeatherObsTrigger(BaseTrigger):
+    """Poll the weather obs endpoint of a station until there is a batch to load.
+
+    It runs in the triggerer, so waiting doesn't hold a worker slot. Every
+    trigger of the triggerer process shares the same `WeatherClient` rate
+    controller.
+    """
+
+    def __init__(
+        self,
+        station_id: str,
+        start: str,
+        poll_interval: float = 60.0,
+        min_batch_size: int = 1,
+        max_batch_wait: Optional[float] = None,
+        max_consecutive_failures: int = 5,
+    ) -> None:
+        """Init the trigger.
+
+        Args:
+            `station_id`: Id of the station to poll.
+            `start`: Watermark, only observations from this date are counted.
+            `poll_interval`: Seconds between polls.
+            `min_batch_size`: Number of new observations worth loading.
+            `max_batch_wait`: Seconds after which any new observation is
+                worth loading, even if there are less than `min_batch_size`.
+            `max_consecutive_failures`: Number of polls in a row that can fail
+                before the trigger gives up.
+        """
+        super().__init__()
+        self.station_id: str = station_id
+        self.start: str = start
+        self.poll_interval: float = poll_interval
+        self.min_batch_size: int = min_batch_size
+        self.max_batch_wait: Optional[float] = max_batch_wait
+        self.max_consecutive_failures: int = max_consecutive_failures
+
+    def serialize(self) -> Tuple[str, Dict[str, Any]]:
+        """Serialize the trigger so the triggerer can rebuild it.
+
+        Returns:
+            The classpath and the kwargs of the trigger.
+        """
+        return (
+            f"{self.__class__.__module__}.{self.__class__.__name__}",
+            {
+                "station_id": self.station_id,
+                "start": self.start,
+                "poll_interval": self.poll_interval,
+                "min_batch_size": self.min_batch_size,
+                "max_batch_wait": self.max_batch_wait,
+                "max_consecutive_failures": self.max_consecutive_failures,
+            },
+        )
+
+    async def run(self) -> AsyncIterator[TriggerEvent]:
+        """Poll the endpoint until a batch worth loading is available.
+
+        Yields:
+            An event with the number of new observations and the last
+            observation timestamp, or an error event if too many polls in a
+            row fail.
+        """
+        weather_client: WeatherClient = WeatherClient()
+        first_poll: float = time.monotonic()
+        failures: int = 0
+        while True:
+            try:
+                timestamps: List[str] = await asyncio.to_thread(
+                    self.get_new_observation_timestamps, weather_client
+                )
+            except Exception as error:
+                failures += 1
+                if failures >= self.max_consecutive_failures:
+                    yield TriggerEvent({"status": "error", "message": str(error)})
+                    return
+                self.log.warning(
+                    f"Station {self.station_id}: poll {failures} of "
+                    f"{self.max_consecutive_failures} failed, retrying: {error}"
+                )
+                await asyncio.sleep(self.poll_interval)
+                continue
+            failures = 0
+
+            waited: float = time.monotonic() - first_poll
+            batch_ready: bool = len(timestamps) >= self.min_batch_size or (
+                len(timestamps) > 0
+                and self.max_batch_wait is not None
+                and waited >= self.max_batch_wait
+            )
+            self.log.info(
+                f"Station {self.station_id}: {len(timestamps)} new observations "
+                f"since {self.start}."
+            )
+            if batch_ready:
+                yield TriggerEvent(
+                    {
+                        "status": "success",
+                        "count": len(timestamps),
+                        "last_observation_timestamp": max(timestamps),
+                    }
+                )
+                return
+            await asyncio.sleep(self.poll_interval)
+
+    def get_new_observation_timestamps(
+        self, weather_client: WeatherClient
+    ) -> List[str]:
+        """Get the timestamps of the observations after the watermark.
+
+        Args:
+            `weather_client`: Client used to make the request.
+
+        Returns:
+            The timestamps of the new observations.
+        """
+        content: bytes = weather_client.make_raw_request(
+            endpoint=os.path.join(
+                WeatherEndpoints.STATIONS.value,
+                self.station_id,
+                WeatherEndpoints.OBSERVATIONS.value,
+            ),
+            params={"start": self.start},
+        )
+        data: Dict[str, Any] = json.loads(content)
+        return [
+            feature["properties"]["timestamp"]
+            for feature in data.get("features", [])
+            if feature.get("properties", {}).get("timestamp")
+        ]
@@ -1,19 +1,45 @@
 """Util script to extract and load the data from weather API."""
+import json
 import logging
+import multiprocessing
 import os
-from datetime import datetime, timedelta
-from typing import Any, Dict, List, NamedTuple, Optional, Union
+from concurrent.futures import Future, ProcessPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple, Union
 
 import duckdb
 import pandas as pd
-from airflow.exceptions import AirflowSkipException
+import pyarrow as pa
+import pyarrow.parquet as pq
+from airflow.exceptions import AirflowException, AirflowSkipException
 from airflow.models import Variable
 
+from include.scripts.weather.analytics import bump_load_version
 from include.scripts.weather.client import WeatherClient, WeatherEndpoints
 
 NULL_VALUE = None
 SELECTED_STATION_ID: str = "0112W"
 DUCK_DB: str = "include/database/duck.db"
+# Compact schema: integer station keys, coordinates kept in the stations
+# tables and DECIMAL measures. See `include/sql/weather/compact`.
+COMPACT_SCHEMA: bool = os.getenv("WEATHER_COMPACT_SCHEMA", "false").lower() == "true"
+# Parallel decode: number of processes that decode the observation pages,
+# 0 disables it. Each page covers `DECODE_WINDOW` of observations. It needs
+# AIRFLOW__CORE__EXECUTE_TASKS_NEW_PYTHON_INTERPRETER=True with the
+# LocalExecutor, whose tasks can't start child processes.
+DECODE_WORKERS: int = int(os.getenv("WEATHER_DECODE_WORKERS", "0"))
+DECODE_WINDOW: timedelta = timedelta(days=1)
+WEATHER_OBS_SCHEMA: pa.Schema = pa.schema(
+    [
+        ("station_id", pa.string()),
+        ("latitude", pa.float64()),
+        ("longitude", pa.float64()),
+        ("observation_timestamp", pa.string()),
+        ("temperature", pa.float64()),
+        ("wind_speed", pa.float64()),
+        ("humidity", pa.float64()),
+    ]
+)
 
 
 class TableMetadata(NamedTuple):
@@ -21,14 +47,48 @@ class TableMetadata(NamedTuple):
 
     name: str
     sql_path: str
+    sort_key: Optional[str] = None
 
 
 STATIONS: TableMetadata = TableMetadata(
     name="stations", sql_path="sql/weather/load_stations_data.sql"
 )
+# Rows are clustered by day first so the zone maps of each row group cover
+# a narrow time range, and by station inside each day.
 WEATHER_OBS: TableMetadata = TableMetadata(
-    name="weather_obs", sql_path="sql/weather/load_weather_obs_data.sql"
+    name="weather_obs",
+    sql_path="sql/weather/load_weather_obs_data.sql",
+    sort_key=(
+        "DATE_TRUNC('day', observation_timestamp), station_id, observation_timestamp"
+    ),
+)
+STATIONS_COMPACT: TableMetadata = TableMetadata(
+    name="stations", sql_path="sql/weather/compact/load_stations_data.sql"
 )
+WEATHER_OBS_COMPACT: TableMetadata = TableMetadata(
+    name="weather_obs",
+    sql_path="sql/weather/compact/load_weather_obs_data.sql",
+    sort_key=(
+        "DATE_TRUNC('day', observation_timestamp), station_key, observation_timestamp"
+    ),
+)
+
+
+def get_tables_metadata(
+    compact_schema: bool = COMPACT_SCHEMA,
+) -> Tuple[TableMetadata, TableMetadata]:
+    """Get the metadata of the tables for the schema in use.
+
+    Args:
+        `compact_schema`: Whether the database uses the compact schema.
+            By default it is taken from the env var `WEATHER_COMPACT_SCHEMA`.
+
+    Returns:
+        The metadata of the stations and weather obs tables.
+    """
+    if compact_schema:
+        return STATIONS_COMPACT, WEATHER_OBS_COMPACT
+    return STATIONS, WEATHER_OBS
 
 
 def get_start_param(start_date: str, last_end_date: str) -> Optional[str]:
@@ -73,6 +133,11 @@ def extract_weather_obs_data(ts: str, start: str) -> str:
         Path where the raw data obtained from the API request
         was stored.
     """
+    if DECODE_WORKERS > 0:
+        return extract_weather_obs_data_parallel(
+            ts=ts, start=start, workers=DECODE_WORKERS
+        )
+
     weather_client: WeatherClient = WeatherClient()
     station_obs_endpoint: str = os.path.join(
         WeatherEndpoints.STATIONS.value,
@@ -113,6 +178,136 @@ def extract_weather_obs_data(ts: str, start: str) -> str:
     return saved_file_path
 
 
+def extract_weather_obs_data_parallel(
+    ts: str, start: str, workers: int, window: timedelta = DECODE_WINDOW
+) -> str:
+    """Extract the weather obs data decoding the pages in a process pool.
+
+    The time range is split in pages of `window`, the pages are requested
+    one by one and their raw bodies are decoded and projected by the pool
+    meanwhile, so the CPU work of large backfills uses every core.
+
+    Args:
+        `ts`: The DAG run start date.
+        `start`: The param to specify from when extract
+            data from the weather obs endpoint.
+        `workers`: Number of processes that decode the pages.
+        `window`: Period of time covered by each page.
+
+    Returns:
+        Path where the raw data obtained from the API request
+        was stored.
+    """
+    # The LocalExecutor runs the tasks in forks of a daemonic process, which
+    # can't start the processes of the pool.
+    if multiprocessing.current_process().daemon:
+        raise AirflowException(
+            "The decode workers can't start from a daemonic process. Set "
+            "AIRFLOW__CORE__EXECUTE_TASKS_NEW_PYTHON_INTERPRETER=True to run "
+            "the tasks in a new interpreter, or WEATHER_DECODE_WORKERS=0."
+        )
+
+    weather_client: WeatherClient = WeatherClient()
+    station_obs_endpoint: str = os.path.join(
+        WeatherEndpoints.STATIONS.value,
+        SELECTED_STATION_ID,
+        WeatherEndpoints.OBSERVATIONS.value,
+    )
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures: List[Future] = [
+            executor.submit(
+                decode_weather_obs_page,
+                weather_client.make_raw_request(
+                    endpoint=station_obs_endpoint, params=params
+                ),
+            )
+            for params in get_time_window_params(start=start, window=window)
+        ]
+        tables: List[pa.Table] = [
+            pa.ipc.open_stream(future.result()).read_all() for future in futures
+        ]
+
+    extracted_data: pa.Table = pa.concat_tables(tables)
+
+    if extracted_data.num_rows == 0:
+        logging.info("No new data to ingest.")
+        raise AirflowSkipException("Skipping downstream tasks.")
+
+    extracted_data_sorted: pa.Table = extracted_data.sort_by("observation_timestamp")
+
+    last_observation_timestamp: str = extracted_data_sorted["observation_timestamp"][
+        -1
+    ].as_py()
+    logging.info(f"Number of rows retrieved: {extracted_data_sorted.num_rows}")
+    logging.info(
+        "Updating the var weather_obs_last_date with value: "
+        f"{last_observation_timestamp}"
+    )
+    Variable.set("weather_obs_last_date", last_observation_timestamp)
+
+    saved_file_path: str = save_table_to_disk(
+        table=extracted_data_sorted, table_name=WEATHER_OBS.name, ts=ts
+    )
+
+    return saved_file_path
+
+
+def get_time_window_params(
+    start: str, window: timedelta, end: Optional[datetime] = None
+) -> List[Dict[str, str]]:
+    """Split the time range to extract in the params of several requests.
+
+    Args:
+        `start`: The param to specify from when extract data.
+        `window`: Period of time covered by each request.
+        `end`: Until when extract data, by default now. The last
+            request doesn't have an end so it gets the latest data.
+
+    Returns:
+        The params of each request, `start` and `end` are inclusive
+        so the windows are separated by 1 second.
+    """
+    end = end or datetime.now(timezone.utc)
+    window_start: datetime = datetime.fromisoformat(start)
+    params: List[Dict[str, str]] = []
+    while window_start + window < end:
+        window_end: datetime = window_start + window
+        params.append(
+            {
+                "start": window_start.isoformat(),
+                "end": (window_end - timedelta(seconds=1)).isoformat(),
+            }
+        )
+        window_start = window_end
+    params.append({"start": window_start.isoformat()})
+    return params
+
+
+def decode_weather_obs_page(content: bytes) -> bytes:
+    """Decode a page of weather obs and project the fields of the table.
+
+    It runs in the process pool, the result is returned as an Arrow IPC
+    stream because it is much cheaper to send between processes than
+    the Python objects.
+
+    Args:
+        `content`: Raw body of the weather obs endpoint response.
+
+    Returns:
+        The required data serialized as an Arrow IPC stream.
+    """
+    data: Dict[str, Any] = json.loads(content)
+    batch: pa.RecordBatch = pa.RecordBatch.from_pylist(
+        [extract_weather_fields(feature) for feature in data["features"]],
+        schema=WEATHER_OBS_SCHEMA,
+    )
+    sink: pa.BufferOutputStream = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, WEATHER_OBS_SCHEMA) as writer:
+        writer.write_batch(batch)
+    return sink.getvalue().to_pybytes()
+
+
 def extract_stations_data(ts: str) -> str:
     """Extract the stations data from Weather API.
 
@@ -151,12 +346,72 @@ def load_extracted_data(sql_query: str) -> None:
             into the specified table.
 
     Returns:
-        None, only execute the query.
+        None, only execute the query and bump the load version
+        of the database to invalidate the cached analytics.
     """
     with duckdb.connect(DUCK_DB) as con:
         logging.info(f"Executing query: \n {sql_query}")
         con.execute(sql_query)
-        logging.info("Done :)")
+        version: int = bump_load_version(DUCK_DB)
+        logging.info(f"Done :) load version: {version}")
+
+
+def compact_database(
+    database: str = DUCK_DB, compact_schema: bool = COMPACT_SCHEMA
+) -> None:
+    """Rewrite the database sorting the tables and reclaiming free space.
+
+    DuckDB reuses the blocks freed by deletes and updates but never shrinks
+    the file, so the tables are copied into a new database file, using the
+    `sort_key` of each table, which then replaces the current one.
+    Nothing else may write to the database meanwhile, a load committed to
+    the old file would be lost, so it runs in the same one slot pool as
+    every `load_data` task.
+
+    Args:
+        `database`: Path of the DuckDB database to compact.
+        `compact_schema`: Whether the database uses the compact schema.
+
+    Returns:
+        None, only rewrite the database file.
+    """
+    sort_keys: Dict[str, str] = {
+        table.name: table.sort_key
+        for table in get_tables_metadata(compact_schema)
+        if table.sort_key
+    }
+    compacted_database: str = f"{database}.compacted"
+    if os.path.exists(compacted_database):
+        os.remove(compacted_database)
+
+    with duckdb.connect(database) as con:
+        catalog: str = con.execute("SELECT current_database()").fetchone()[0]
+        con.execute(f"ATTACH '{compacted_database}' AS compacted")
+        con.execute(f"COPY FROM DATABASE {catalog} TO compacted (SCHEMA)")
+        tables: List[str] = [
+            table_name
+            for (table_name,) in con.execute(
+                "SELECT table_name FROM duckdb_tables() WHERE database_name = ?",
+                [catalog],
+            ).fetchall()
+        ]
+        for table_name in tables:
+            order_by: str = (
+                f"ORDER BY {sort_keys[table_name]}" if table_name in sort_keys else ""
+            )
+            logging.info(f"Rewriting table {table_name} {order_by}")
+            con.execute(
+                f"INSERT INTO compacted.{table_name} "
+                f"SELECT * FROM {catalog}.{table_name} {order_by}"
+            )
+        con.execute("CHECKPOINT compacted")
+        con.execute("DETACH compacted")
+
+    size_before: int = os.path.getsize(database)
+    os.replace(compacted_database, database)
+    logging.info(
+        f"Database compacted from {size_before} to {os.path.getsize(database)} bytes"
+    )
 
 
 def extract_weather_fields(feature: Dict[str, Any]) -> Dict[str, Union[str, float]]:
@@ -172,7 +427,8 @@ def extract_weather_fields(feature: Dict[str, Any]) -> Dict[str, Union[str, floa
     station_id: str = SELECTED_STATION_ID
     latitude: float
     longitude: float
-    latitude, longitude = feature.get("geometry", {}).get("coordinates", NULL_VALUE)
+    # GeoJSON coordinates are in (longitude, latitude) order.
+    longitude, latitude = feature.get("geometry", {}).get("coordinates", NULL_VALUE)
     feature_properties: Dict[str, Any] = feature.get("properties", {})
     observation_timestamp: str = feature_properties.get("timestamp", NULL_VALUE)
     temperature: float = feature_properties.get("temperature", {}).get(
@@ -224,13 +480,42 @@ def save_data_to_disk(data: List[Dict[str, Any]], table_name: str, ts: str) -> s
     Returns:
         The path where the raw data was stored.
     """
-    raw_folder: str = os.path.join(os.getcwd(), "raw/weather_api")
-    os.makedirs(raw_folder, exist_ok=True)
-
-    raw_file_path: str = f"{raw_folder}/{table_name}_{ts}.parquet"
+    raw_file_path: str = get_raw_file_path(table_name=table_name, ts=ts)
 
     df: pd.DataFrame = pd.DataFrame(data)
     with open(raw_file_path, "wb") as file:
         df.to_parquet(file, compression="snappy")
         logging.info(f"Saved data into: {raw_file_path}")
     return raw_file_path
+
+
+def save_table_to_disk(table: pa.Table, table_name: str, ts: str) -> str:
+    """Save an Arrow table as a parquet file using snappy compression.
+
+    Args:
+        `table`: Arrow table that contains the data to save.
+        `table_name`: Name of the table that will receive this data.
+        `ts`: The DAG run start date.
+
+    Returns:
+        The path where the raw data was stored.
+    """
+    raw_file_path: str = get_raw_file_path(table_name=table_name, ts=ts)
+    pq.write_table(table, raw_file_path, compression="snappy")
+    logging.info(f"Saved data into: {raw_file_path}")
+    return raw_file_path
+
+
+def get_raw_file_path(table_name: str, ts: str) -> str:
+    """Get the path where to store the raw data of a table.
+
+    Args:
+        `table_name`: Name of the table that will receive this data.
+        `ts`: The DAG run start date.
+
+    Returns:
+        The path of the parquet file, its folder is created if needed.
+    """
+    raw_folder: str = os.path.join(os.getcwd(), "raw/weather_api")
+    os.makedirs(raw_folder, exist_ok=True)
+    return f"{raw_folder}/{table_name}_{ts}.parquet"
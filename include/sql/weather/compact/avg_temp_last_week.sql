@@ -0,0 +1,13 @@
+SELECT
+    stations.station_id,
+    station_name,
+    AVG(temperature) AS average_temperature
+FROM
+    weather_obs
+INNER JOIN
+    stations
+ON weather_obs.station_key = stations.station_key
+WHERE
+    observation_timestamp BETWEEN (current_date() - INTERVAL 7 DAY) AND current_date()
+GROUP BY
+    1,2;
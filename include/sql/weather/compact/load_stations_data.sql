@@ -0,0 +1,11 @@
+INSERT INTO stations (station_key, station_id, station_name, station_timezone)
+SELECT
+    (SELECT COALESCE(MAX(station_key), 0) FROM stations) + ROW_NUMBER() OVER () AS station_key,
+    station_id,
+    station_name,
+    station_timezone
+FROM
+    READ_PARQUET("{{ task_instance.xcom_pull(task_ids='stations.extract_data', key='return_value') }}")
+ON CONFLICT (station_id) DO UPDATE SET
+    station_name = EXCLUDED.station_name,
+    station_timezone = EXCLUDED.station_timezone;
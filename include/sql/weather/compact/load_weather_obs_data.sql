@@ -0,0 +1,116 @@
+-- A single transaction, so a failed load doesn't leave the history of the
+-- stations rewritten for a retry.
+BEGIN TRANSACTION;
+
+CREATE OR REPLACE TEMP TABLE weather_obs_raw AS
+SELECT
+    raw.station_id,
+    stations.station_key,
+    CAST(raw.latitude AS DECIMAL(9, 6)) AS latitude,
+    CAST(raw.longitude AS DECIMAL(9, 6)) AS longitude,
+    CAST(raw.observation_timestamp AS TIMESTAMP) AS observation_timestamp,
+    CAST(raw.temperature AS DECIMAL(5, 2)) AS temperature,
+    CAST(raw.wind_speed AS DECIMAL(5, 2)) AS wind_speed,
+    CAST(raw.humidity AS DECIMAL(5, 2)) AS humidity
+FROM
+    READ_PARQUET("{{ task_instance.xcom_pull(task_ids='weather_obs.extract_data', key='return_value') }}") AS raw
+LEFT JOIN
+    stations
+ON raw.station_id = stations.station_id;
+
+-- Fail instead of dropping the observations of a station not loaded yet,
+-- the watermark has already moved past them.
+SELECT
+    error('Unknown station_id ' || station_id || ', load the stations first.')
+FROM
+    weather_obs_raw
+WHERE
+    station_key IS NULL
+LIMIT 1;
+
+-- Rebuild the open location of each station plus every move in this batch.
+CREATE OR REPLACE TEMP TABLE stations_location_changes AS
+WITH locations AS (
+    SELECT
+        station_key,
+        observation_timestamp AS valid_from,
+        latitude,
+        longitude
+    FROM
+        weather_obs_raw
+    UNION ALL
+    SELECT
+        station_key,
+        valid_from,
+        latitude,
+        longitude
+    FROM
+        stations_location_history
+    WHERE
+        valid_to IS NULL
+),
+lagged_locations AS (
+    SELECT
+        *,
+        LAG(latitude) OVER station_window AS previous_latitude,
+        LAG(longitude) OVER station_window AS previous_longitude,
+        ROW_NUMBER() OVER station_window AS location_number
+    FROM
+        locations
+    WINDOW station_window AS (PARTITION BY station_key ORDER BY valid_from)
+)
+SELECT
+    station_key,
+    latitude,
+    longitude,
+    valid_from,
+    LEAD(valid_from) OVER (PARTITION BY station_key ORDER BY valid_from) AS valid_to
+FROM
+    lagged_locations
+WHERE
+    location_number = 1
+    OR latitude IS DISTINCT FROM previous_latitude
+    OR longitude IS DISTINCT FROM previous_longitude;
+
+DELETE FROM stations_location_history
+WHERE
+    valid_to IS NULL
+    AND station_key IN (SELECT station_key FROM stations_location_changes);
+
+INSERT INTO stations_location_history
+SELECT
+    station_key,
+    latitude,
+    longitude,
+    valid_from,
+    valid_to
+FROM
+    stations_location_changes;
+
+UPDATE stations
+SET
+    latitude = stations_location_changes.latitude,
+    longitude = stations_location_changes.longitude
+FROM
+    stations_location_changes
+WHERE
+    stations.station_key = stations_location_changes.station_key
+    AND stations_location_changes.valid_to IS NULL;
+
+INSERT INTO weather_obs
+SELECT
+    station_key,
+    observation_timestamp,
+    temperature,
+    wind_speed,
+    humidity
+FROM
+    weather_obs_raw
+ORDER BY
+    station_key,
+    observation_timestamp;
+
+DROP TABLE weather_obs_raw;
+DROP TABLE stations_location_changes;
+
+COMMIT;
@@ -0,0 +1,7 @@
+CREATE OR REPLACE TABLE stations_location_history (
+    station_key INTEGER,
+    latitude DECIMAL(9, 6),
+    longitude DECIMAL(9, 6),
+    valid_from TIMESTAMP,
+    valid_to TIMESTAMP
+);
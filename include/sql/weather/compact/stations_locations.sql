@@ -0,0 +1,9 @@
+SELECT
+    station_id,
+    CAST(latitude AS DOUBLE) AS latitude,
+    CAST(longitude AS DOUBLE) AS longitude
+FROM
+    stations
+WHERE
+    latitude IS NOT NULL
+    AND longitude IS NOT NULL;
@@ -0,0 +1,8 @@
+CREATE OR REPLACE TABLE stations (
+    station_key INTEGER PRIMARY KEY,
+    station_id VARCHAR UNIQUE,
+    station_name VARCHAR,
+    station_timezone VARCHAR,
+    latitude DECIMAL(9, 6),
+    longitude DECIMAL(9, 6)
+);
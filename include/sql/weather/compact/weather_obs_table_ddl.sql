@@ -0,0 +1,7 @@
+CREATE OR REPLACE TABLE weather_obs (
+    station_key INTEGER,
+    observation_timestamp TIMESTAMP,
+    temperature DECIMAL(5, 2),
+    wind_speed DECIMAL(5, 2),
+    humidity DECIMAL(5, 2)
+);
@@ -8,4 +8,7 @@ SELECT
     ROUND(wind_speed, 2) AS wind_speed,
     ROUND(humidity, 2) AS humidity
 FROM
-    READ_PARQUET("{{ task_instance.xcom_pull(task_ids='weather_obs.extract_data', key='return_value') }}");
+    READ_PARQUET("{{ task_instance.xcom_pull(task_ids='weather_obs.extract_data', key='return_value') }}")
+ORDER BY
+    station_id,
+    observation_timestamp;
@@ -0,0 +1,11 @@
+SELECT
+    station_id,
+    ARG_MAX(latitude, observation_timestamp) AS latitude,
+    ARG_MAX(longitude, observation_timestamp) AS longitude
+FROM
+    weather_obs
+WHERE
+    latitude IS NOT NULL
+    AND longitude IS NOT NULL
+GROUP BY
+    station_id;
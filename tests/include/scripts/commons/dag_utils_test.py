@@ -20,6 +20,13 @@ class TestDagUtils(TestCase):
 
         assert response == expected_response
 
+    def test_get_duck_db_writer_pool(self) -> None:
+        """Test for get_duck_db_writer_pool function."""
+        response: str = dag_utils.get_duck_db_writer_pool()
+        expected_response: str = "duck_db_writer"
+
+        assert response == expected_response
+
     def test_get_default_args(self) -> None:
         """Test for get_default_args function."""
         response: Dict[str, Any] = dag_utils.get_default_args(
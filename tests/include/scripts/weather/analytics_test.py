@@ -0,0 +1,95 @@
+"""Script to test the analytics queries with cache."""
+import os
+import tempfile
+from typing import Any, List
+from unittest import TestCase
+from unittest.mock import MagicMock, patch
+
+import duckdb
+import pandas as pd
+
+import include.scripts.weather.analytics as analytics
+from include.scripts.weather.analytics import AnalyticsClient
+
+
+class TestAnalytics(TestCase):
+    """Test analytics functions and AnalyticsClient class."""
+
+    def setUp(self) -> None:
+        """Set up test properties."""
+        self.tmp_dir: tempfile.TemporaryDirectory = tempfile.TemporaryDirectory()
+        self.database: str = os.path.join(self.tmp_dir.name, "duck.db")
+        self.sql_path: str = os.path.join(self.tmp_dir.name, "query.sql")
+        with open(self.sql_path, "w") as file:
+            file.write("SELECT COUNT(*) AS total FROM obs WHERE value > $min_value")
+        with duckdb.connect(self.database) as con:
+            con.execute("CREATE TABLE obs AS SELECT * FROM range(10) t(value)")
+
+    def tearDown(self) -> None:
+        """Remove the temporary files."""
+        self.tmp_dir.cleanup()
+
+    def test_load_version(self) -> None:
+        """Test for get_load_version and bump_load_version functions."""
+        assert analytics.get_load_version(self.database) == 0
+        assert analytics.bump_load_version(self.database) == 1
+        assert analytics.bump_load_version(self.database) == 2
+        assert analytics.get_load_version(self.database) == 2
+
+    @patch("include.scripts.weather.analytics.duckdb", wraps=duckdb)
+    def test_run_query(self, duckdb_mock: MagicMock) -> None:
+        """Test for run_query function."""
+        client: AnalyticsClient = AnalyticsClient(database=self.database)
+
+        response: pd.DataFrame = client.run_query(self.sql_path, {"min_value": 4})
+        assert response["total"].tolist() == [5]
+
+        # Same query, params and load version is read from the cache.
+        response = client.run_query(self.sql_path, {"min_value": 4})
+        assert response["total"].tolist() == [5]
+        assert duckdb_mock.connect.call_count == 1
+
+        # Different params are cached separately.
+        response = client.run_query(self.sql_path, {"min_value": 7})
+        assert response["total"].tolist() == [2]
+        assert duckdb_mock.connect.call_count == 2
+
+        # A new load invalidates the cached results.
+        with duckdb.connect(self.database) as con:
+            con.execute("INSERT INTO obs VALUES (100)")
+            analytics.bump_load_version(self.database)
+        response = client.run_query(self.sql_path, {"min_value": 4})
+        assert response["total"].tolist() == [6]
+        assert duckdb_mock.connect.call_count == 3
+
+    def test_run_query_lru_eviction(self) -> None:
+        """Test for run_query function when the cache is full."""
+        client: AnalyticsClient = AnalyticsClient(database=self.database, cache_size=2)
+        for min_value in (1, 2, 1, 3):
+            client.run_query(self.sql_path, {"min_value": min_value})
+
+        cached_params: List[Any] = [key[1] for key in client._cache]
+        assert cached_params == [(("min_value", 1),), (("min_value", 3),)]
+
+    def test_reports(self) -> None:
+        """Test for avg_temp_last_week and max_wind_change_last_week functions."""
+        sql_folder: str = "include/sql/weather"
+        with duckdb.connect(self.database) as con:
+            for ddl in ("stations_table_ddl.sql", "weather_obs_table_ddl.sql"):
+                with open(os.path.join(sql_folder, ddl)) as file:
+                    con.execute(file.read())
+            con.execute("INSERT INTO stations VALUES ('0112W', 'name', 'UTC')")
+            con.execute(
+                "INSERT INTO weather_obs VALUES "
+                "('0112W', 1, 1, current_date() - INTERVAL 1 DAY, 20, 5, 50), "
+                "('0112W', 1, 1, current_date() - INTERVAL 2 DAY, 30, 8, 50)"
+            )
+        client: AnalyticsClient = AnalyticsClient(
+            database=self.database, sql_folder=sql_folder
+        )
+
+        avg_temp: pd.DataFrame = client.avg_temp_last_week()
+        max_wind_change: pd.DataFrame = client.max_wind_change_last_week()
+
+        assert avg_temp["average_temperature"].tolist() == [25.0]
+        assert max_wind_change["max_wind_speed_change"].tolist() == [3.0]
@@ -1,9 +1,11 @@
 """Script to test WeatherClient class."""
+from datetime import timedelta
 from typing import Any, Dict
 from unittest import TestCase
 from unittest.mock import MagicMock, call, patch
 
 from include.scripts.weather.client import WeatherClient
+from include.scripts.weather.rate_controller import RateController, RateLimits
 
 
 class TestWeatherClient(TestCase):
@@ -22,6 +24,8 @@ class TestWeatherClient(TestCase):
     def test_make_request(self, requests_mock: MagicMock) -> None:
         """Test for make_request function."""
         data_mock: MagicMock = MagicMock()
+        data_mock.status_code = 200
+        data_mock.elapsed = timedelta(seconds=0.1)
         data_mock.json.return_value = self.data
         requests_mock.get.return_value = data_mock
 
@@ -34,8 +38,52 @@ class TestWeatherClient(TestCase):
 
         requests_mock.assert_has_calls(
             [
-                call.get(url=self.url, params=self.params, headers=self.headers),
+                call.get(
+                    url=self.url,
+                    params=self.params,
+                    headers=self.headers,
+                    timeout=(10.0, 30.0),
+                ),
                 call.get().raise_for_status(),
                 call.get().json(),
             ]
         )
+
+    @patch("include.scripts.weather.client.time")
+    @patch("include.scripts.weather.client.requests")
+    def test_make_request_throttled(
+        self, requests_mock: MagicMock, time_mock: MagicMock
+    ) -> None:
+        """Test for make_request function when the API throttles the client."""
+        rate_controller: RateController = RateController(
+            name="test_throttled", limits=RateLimits(initial_limit=4.0)
+        )
+        client: WeatherClient = WeatherClient(rate_controller=rate_controller)
+        initial_limit: float = rate_controller.state().limit
+
+        throttled_mock: MagicMock = MagicMock()
+        throttled_mock.status_code = 429
+        throttled_mock.elapsed = timedelta(seconds=0.1)
+        throttled_mock.headers = {"Retry-After": "3"}
+        data_mock: MagicMock = MagicMock()
+        data_mock.status_code = 200
+        data_mock.elapsed = timedelta(seconds=0.1)
+        data_mock.json.return_value = self.data
+        requests_mock.get.side_effect = [throttled_mock, data_mock]
+
+        response = client.make_request(endpoint=self.endpoint)
+
+        assert response == self.data
+        assert requests_mock.get.call_count == 2
+        time_mock.sleep.assert_called_once_with(3.0)
+        assert rate_controller.state().limit < initial_limit
+        assert rate_controller.state().in_flight == 0
+
+    def test_get_retry_after(self) -> None:
+        """Test for get_retry_after function."""
+        response_mock: MagicMock = MagicMock()
+        response_mock.headers = {"Retry-After": "10"}
+        assert WeatherClient.get_retry_after(response_mock, attempt=0) == 10.0
+
+        response_mock.headers = {}
+        assert WeatherClient.get_retry_after(response_mock, attempt=3) == 8.0
@@ -0,0 +1,223 @@
+"""Script to test the rate controller for the Weather API."""
+import os
+import statistics
+import tempfile
+import threading
+import time
+from typing import List
+from unittest import TestCase
+
+from include.scripts.weather.rate_controller import (
+    RateController,
+    RateLimits,
+    RateState,
+    get_rate_controller,
+    next_state,
+)
+
+
+class TestRateController(TestCase):
+    """Test RateController class and its helpers."""
+
+    def setUp(self) -> None:
+        """Set up test properties."""
+        self.limits: RateLimits = RateLimits(
+            min_limit=1.0, max_limit=8.0, initial_limit=2.0, poll_interval=0.001
+        )
+
+    def test_next_state(self) -> None:
+        """Test for next_state function."""
+        # First request sets the latency baseline and increases the limit.
+        state: RateState = next_state(
+            limit=2.0,
+            baseline_latency=None,
+            latency=0.1,
+            throttled=False,
+            limits=self.limits,
+        )
+        assert state.baseline_latency == 0.1
+        assert state.limit == 2.5
+
+        # A throttled request cuts the limit.
+        state = next_state(
+            limit=4.0,
+            baseline_latency=0.1,
+            latency=0.1,
+            throttled=True,
+            limits=self.limits,
+        )
+        assert state.limit == 2.0
+
+        # A latency above the tolerance also cuts the limit.
+        state = next_state(
+            limit=4.0,
+            baseline_latency=0.1,
+            latency=1.0,
+            throttled=False,
+            limits=self.limits,
+        )
+        assert state.limit == 2.0
+
+        # The limit never goes out of its bounds.
+        state = next_state(
+            limit=1.0,
+            baseline_latency=0.1,
+            latency=0.1,
+            throttled=True,
+            limits=self.limits,
+        )
+        assert state.limit == self.limits.min_limit
+        state = next_state(
+            limit=8.0,
+            baseline_latency=0.1,
+            latency=0.1,
+            throttled=False,
+            limits=self.limits,
+        )
+        assert state.limit == self.limits.max_limit
+
+    def test_next_state_once_per_window(self) -> None:
+        """Test for next_state function with several throttled requests."""
+        state: RateState = next_state(
+            limit=8.0,
+            baseline_latency=0.1,
+            latency=0.1,
+            throttled=True,
+            limits=self.limits,
+            acquired_at=10.0,
+            released_at=11.0,
+            last_decrease=None,
+        )
+        assert state.limit == 4.0
+        assert state.last_decrease == 11.0
+
+        # A request already in flight when the limit was cut doesn't cut
+        # it again.
+        state = next_state(
+            limit=state.limit,
+            baseline_latency=0.1,
+            latency=0.1,
+            throttled=True,
+            limits=self.limits,
+            acquired_at=10.5,
+            released_at=11.5,
+            last_decrease=state.last_decrease,
+        )
+        assert state.limit == 4.0
+        assert state.last_decrease == 11.0
+
+        # A request sent with the new limit does.
+        state = next_state(
+            limit=state.limit,
+            baseline_latency=0.1,
+            latency=0.1,
+            throttled=True,
+            limits=self.limits,
+            acquired_at=11.2,
+            released_at=12.0,
+            last_decrease=state.last_decrease,
+        )
+        assert state.limit == 2.0
+        assert state.last_decrease == 12.0
+
+    def test_slot(self) -> None:
+        """Test for slot function using the memory state."""
+        controller: RateController = RateController(
+            name="test_slot", limits=self.limits
+        )
+        with controller.slot(), controller.slot():
+            assert controller.state().in_flight == 2
+
+        assert controller.state().in_flight == 0
+        assert controller.state().limit > self.limits.initial_limit
+
+        with controller.slot() as request_slot:
+            request_slot.throttled()
+        assert controller.state().limit < self.limits.initial_limit
+
+    def test_slot_converges(self) -> None:
+        """Test for slot function with many threads against a limited API."""
+        controller: RateController = RateController(
+            name="test_slot_converges",
+            limits=RateLimits(max_limit=32.0, poll_interval=0.001),
+        )
+        capacity: int = 6
+        lock: threading.Lock = threading.Lock()
+        in_flight: List[int] = [0]
+        stop: float = time.monotonic() + 2
+
+        def make_requests() -> None:
+            while time.monotonic() < stop:
+                with controller.slot() as request_slot:
+                    with lock:
+                        in_flight[0] += 1
+                        throttled: bool = in_flight[0] > capacity
+                    time.sleep(0.01)
+                    with lock:
+                        in_flight[0] -= 1
+                    request_slot.latency = 0.01
+                    if throttled:
+                        request_slot.throttled()
+
+        threads: List[threading.Thread] = [
+            threading.Thread(target=make_requests) for _ in range(32)
+        ]
+        for thread in threads:
+            thread.start()
+        time.sleep(1)
+        limits: List[float] = []
+        while time.monotonic() < stop:
+            limits.append(controller.state().limit)
+            time.sleep(0.01)
+        for thread in threads:
+            thread.join()
+
+        # The limit oscillates around the capacity instead of collapsing to
+        # the min limit on every congestion.
+        assert min(limits) >= capacity / 2
+        assert capacity / 2 <= statistics.mean(limits) <= capacity * 1.5
+
+    def test_slot_reported_latency(self) -> None:
+        """Test for slot function when the request reports its latency."""
+        controller: RateController = RateController(
+            name="test_slot_latency", limits=self.limits
+        )
+        with controller.slot() as request_slot:
+            request_slot.latency = 0.1
+        limit: float = controller.state().limit
+
+        # A slow body download doesn't count as congestion, only the
+        # reported time until the headers.
+        with controller.slot() as request_slot:
+            time.sleep(0.3)
+            request_slot.latency = 0.1
+
+        assert controller.state().baseline_latency == 0.1
+        assert controller.state().limit > limit
+
+    def test_slot_shared_state(self) -> None:
+        """Test for slot function using the SQLite state."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            state_path: str = os.path.join(tmp_dir, "rate_controller.db")
+            first: RateController = RateController(
+                name="test_shared", state_path=state_path, limits=self.limits
+            )
+            second: RateController = RateController(
+                name="test_shared", state_path=state_path, limits=self.limits
+            )
+
+            with first.slot():
+                assert second.state().in_flight == 1
+                with second.slot() as request_slot:
+                    request_slot.throttled()
+                assert first.state().limit < self.limits.initial_limit
+
+            assert first.state().in_flight == 0
+            assert first.state().limit == second.state().limit
+
+    def test_get_rate_controller(self) -> None:
+        """Test for get_rate_controller function."""
+        controller: RateController = get_rate_controller(name="test_get")
+
+        assert get_rate_controller(name="test_get") is controller
+        assert get_rate_controller(name="test_get_other") is not controller
@@ -0,0 +1,64 @@
+"""Script to test the sensors of the Weather API."""
+from typing import Any, Dict
+from unittest import TestCase
+from unittest.mock import MagicMock
+
+from airflow.exceptions import AirflowException, TaskDeferred
+
+from include.scripts.weather.sensors import WeatherObsSensor
+from include.scripts.weather.triggers import WeatherObsTrigger
+
+
+class TestWeatherObsSensor(TestCase):
+    """Test WeatherObsSensor class."""
+
+    def setUp(self) -> None:
+        """Set up test properties."""
+        self.sensor: WeatherObsSensor = WeatherObsSensor(
+            task_id="wait_data",
+            station_id="0112W",
+            start="2024-08-30T09:00:01+00:00",
+            poll_interval=30,
+            min_batch_size=3,
+        )
+
+    def test_execute(self) -> None:
+        """Test for execute function."""
+        try:
+            self.sensor.execute(context=MagicMock())
+        except TaskDeferred as deferred:
+            assert isinstance(deferred.trigger, WeatherObsTrigger)
+            assert deferred.method_name == "execute_complete"
+            assert deferred.trigger.serialize()[1] == {
+                "station_id": "0112W",
+                "start": "2024-08-30T09:00:01+00:00",
+                "poll_interval": 30,
+                "min_batch_size": 3,
+                "max_batch_wait": None,
+                "max_consecutive_failures": 5,
+            }
+        else:
+            raise AssertionError("Sensor did not defer")
+
+    def test_execute_complete(self) -> None:
+        """Test for execute_complete function."""
+        event: Dict[str, Any] = {
+            "status": "success",
+            "count": 3,
+            "last_observation_timestamp": "2024-08-30T09:40:00+00:00",
+        }
+        response: Dict[str, Any] = self.sensor.execute_complete(
+            context=MagicMock(), event=event
+        )
+
+        assert response == event
+
+        # When the trigger failed
+        try:
+            self.sensor.execute_complete(
+                context=MagicMock(), event={"status": "error", "message": "mock"}
+            )
+        except AirflowException as error:
+            assert str(error) == "Polling failed: mock"
+        else:
+            raise AssertionError("Function did not raise an AirflowException")
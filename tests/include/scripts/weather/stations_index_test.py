@@ -0,0 +1,151 @@
+"""Script to test the spatial index of the stations."""
+import os
+import random
+import tempfile
+from typing import List
+from unittest import TestCase
+from unittest.mock import MagicMock, patch
+
+import duckdb
+
+from include.scripts.weather.analytics import bump_load_version
+from include.scripts.weather.stations_index import (
+    BoundingBox,
+    StationLocation,
+    StationsIndex,
+    get_distance_km,
+    get_stations_index,
+    resolve_station_ids,
+)
+
+
+class TestStationsIndex(TestCase):
+    """Test StationsIndex class and its helpers."""
+
+    def setUp(self) -> None:
+        """Set up test properties."""
+        self.stations: List[StationLocation] = [
+            StationLocation("0112W", 30.05, -83.17),
+            StationLocation("KTLH", 30.39, -84.35),
+            StationLocation("KJAX", 30.49, -81.69),
+            StationLocation("KNYC", 40.78, -73.97),
+            StationLocation("PAFA", 64.80, -147.88),
+            StationLocation("NZSP", -89.99, 139.27),
+            StationLocation("FJI", -17.75, 179.99),
+            StationLocation("SAM", -13.83, -171.76),
+        ]
+        self.index: StationsIndex = StationsIndex(self.stations, cell_size=0.5)
+
+    def test_get_distance_km(self) -> None:
+        """Test for get_distance_km function."""
+        assert get_distance_km(30.05, -83.17, 30.05, -83.17) == 0
+        assert round(get_distance_km(0, 0, 0, 1)) == 111
+        assert round(get_distance_km(0, 179.5, 0, -179.5)) == 111
+
+    def test_nearest(self) -> None:
+        """Test for nearest function."""
+        assert self.index.nearest(30.0, -83.0, n=3) == ["0112W", "KTLH", "KJAX"]
+        assert self.index.nearest(40.0, -74.0) == ["KNYC"]
+        # Across the antimeridian and near the pole.
+        assert self.index.nearest(-15.0, -178.0, n=2) == ["FJI", "SAM"]
+        assert self.index.nearest(-90.0, 0.0) == ["NZSP"]
+        # Never more than the indexed stations.
+        assert len(self.index.nearest(0.0, 0.0, n=100)) == len(self.stations)
+        assert StationsIndex([]).nearest(0.0, 0.0) == []
+
+    @patch(
+        "include.scripts.weather.stations_index.get_distance_km",
+        wraps=get_distance_km,
+    )
+    def test_nearest_far_point(self, get_distance_km_mock: MagicMock) -> None:
+        """Test for nearest function with a point far from every station."""
+        random_generator: random.Random = random.Random(0)
+        stations: List[StationLocation] = [
+            StationLocation(
+                f"S{i}",
+                random_generator.uniform(25, 49),
+                random_generator.uniform(-125, -67),
+            )
+            for i in range(5000)
+        ]
+        index: StationsIndex = StationsIndex(stations, cell_size=0.5)
+
+        for latitude, longitude in [(48.0, 2.0), (-40.0, 150.0), (89.9, 0.0)]:
+            get_distance_km_mock.reset_mock()
+            response: List[str] = index.nearest(latitude, longitude, n=5)
+            assert response == [
+                station_id
+                for _, station_id in sorted(
+                    (
+                        get_distance_km(
+                            latitude, longitude, station.latitude, station.longitude
+                        ),
+                        station.station_id,
+                    )
+                    for station in stations
+                )[:5]
+            ]
+            # Only a few cells are visited, not the whole catalog.
+            assert get_distance_km_mock.call_count < len(stations) / 4
+
+    def test_within_bbox(self) -> None:
+        """Test for within_bbox function."""
+        response: List[str] = self.index.within_bbox(
+            BoundingBox(
+                min_latitude=29.0,
+                min_longitude=-85.0,
+                max_latitude=31.0,
+                max_longitude=-82.0,
+            )
+        )
+        assert sorted(response) == ["0112W", "KTLH"]
+
+        # Bounding box crossing the antimeridian.
+        response = self.index.within_bbox(
+            BoundingBox(
+                min_latitude=-20.0,
+                min_longitude=170.0,
+                max_latitude=-10.0,
+                max_longitude=-170.0,
+            )
+        )
+        assert sorted(response) == ["FJI", "SAM"]
+
+    def test_resolve_station_ids(self) -> None:
+        """Test for resolve_station_ids and get_stations_index functions."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            database: str = os.path.join(tmp_dir, "duck.db")
+            with duckdb.connect(database) as con:
+                with open("include/sql/weather/weather_obs_table_ddl.sql") as file:
+                    con.execute(file.read())
+                con.execute(
+                    "INSERT INTO weather_obs VALUES "
+                    "('0112W', 10.0, 10.0, '2024-08-29 10:00:00', 1, 1, 1), "
+                    "('0112W', 30.05, -83.17, '2024-08-30 10:00:00', 1, 1, 1), "
+                    "('KNYC', 40.78, -73.97, '2024-08-30 10:00:00', 1, 1, 1)"
+                )
+
+            response: List[str] = resolve_station_ids(
+                database=database, near=(30.0, -83.0), n=1
+            )
+            assert response == ["0112W"]
+
+            response = resolve_station_ids(
+                database=database,
+                bbox=BoundingBox(
+                    min_latitude=40.0,
+                    min_longitude=-75.0,
+                    max_latitude=41.0,
+                    max_longitude=-73.0,
+                ),
+            )
+            assert response == ["KNYC"]
+
+            # The index is reused until a new load is committed.
+            stations_index: StationsIndex = get_stations_index(database=database)
+            assert get_stations_index(database=database) is stations_index
+            bump_load_version(database)
+            assert get_stations_index(database=database) is not stations_index
+
+            with self.assertRaises(ValueError):
+                resolve_station_ids(database=database)
@@ -0,0 +1,127 @@
+"""Script to test the triggers of the Weather API."""
+import asyncio
+import json
+from typing import Any, Dict, List, Tuple
+from unittest import TestCase
+from unittest.mock import MagicMock, patch
+
+from airflow.triggers.base import TriggerEvent
+
+from include.scripts.weather.triggers import WeatherObsTrigger
+
+
+def get_page(timestamps: List[str]) -> bytes:
+    """Build the raw body of a weather obs response."""
+    return json.dumps(
+        {"features": [{"properties": {"timestamp": ts}} for ts in timestamps]}
+    ).encode()
+
+
+async def get_first_event(trigger: WeatherObsTrigger) -> TriggerEvent:
+    """Run the trigger until its first event."""
+    async for event in trigger.run():
+        return event
+    raise AssertionError("Trigger did not yield any event")
+
+
+class TestWeatherObsTrigger(TestCase):
+    """Test WeatherObsTrigger class."""
+
+    def setUp(self) -> None:
+        """Set up test properties."""
+        self.trigger: WeatherObsTrigger = WeatherObsTrigger(
+            station_id="0112W",
+            start="2024-08-30T09:00:01+00:00",
+            poll_interval=0,
+            min_batch_size=2,
+        )
+
+    def test_serialize(self) -> None:
+        """Test for serialize function."""
+        response: Tuple[str, Dict[str, Any]] = self.trigger.serialize()
+        expected_response: Tuple[str, Dict[str, Any]] = (
+            "include.scripts.weather.triggers.WeatherObsTrigger",
+            {
+                "station_id": "0112W",
+                "start": "2024-08-30T09:00:01+00:00",
+                "poll_interval": 0,
+                "min_batch_size": 2,
+                "max_batch_wait": None,
+                "max_consecutive_failures": 5,
+            },
+        )
+
+        assert response == expected_response
+        assert WeatherObsTrigger(**response[1]).serialize() == response
+
+    @patch("include.scripts.weather.triggers.WeatherClient")
+    def test_run(self, weather_client_mock: MagicMock) -> None:
+        """Test for run function."""
+        make_raw_request_mock: MagicMock = (
+            weather_client_mock.return_value.make_raw_request
+        )
+        make_raw_request_mock.side_effect = [
+            get_page([]),
+            get_page(["2024-08-30T09:20:00+00:00"]),
+            get_page(["2024-08-30T09:20:00+00:00", "2024-08-30T09:40:00+00:00"]),
+        ]
+
+        event: TriggerEvent = asyncio.run(get_first_event(self.trigger))
+
+        assert event.payload == {
+            "status": "success",
+            "count": 2,
+            "last_observation_timestamp": "2024-08-30T09:40:00+00:00",
+        }
+        assert make_raw_request_mock.call_count == 3
+        make_raw_request_mock.assert_called_with(
+            endpoint="stations/0112W/observations",
+            params={"start": "2024-08-30T09:00:01+00:00"},
+        )
+
+    @patch("include.scripts.weather.triggers.WeatherClient")
+    def test_run_max_batch_wait(self, weather_client_mock: MagicMock) -> None:
+        """Test for run function when the batch waited long enough."""
+        weather_client_mock.return_value.make_raw_request.return_value = get_page(
+            ["2024-08-30T09:20:00+00:00"]
+        )
+        self.trigger.max_batch_wait = 0
+
+        event: TriggerEvent = asyncio.run(get_first_event(self.trigger))
+
+        assert event.payload["status"] == "success"
+        assert event.payload["count"] == 1
+
+    @patch("include.scripts.weather.triggers.WeatherClient")
+    def test_run_transient_error(self, weather_client_mock: MagicMock) -> None:
+        """Test for run function when some polls fail but not too many."""
+        make_raw_request_mock: MagicMock = (
+            weather_client_mock.return_value.make_raw_request
+        )
+        make_raw_request_mock.side_effect = [
+            Exception("error_mock"),
+            get_page(["2024-08-30T09:20:00+00:00"]),
+            Exception("error_mock"),
+            Exception("error_mock"),
+            get_page(["2024-08-30T09:20:00+00:00", "2024-08-30T09:40:00+00:00"]),
+        ]
+        self.trigger.max_consecutive_failures = 3
+
+        event: TriggerEvent = asyncio.run(get_first_event(self.trigger))
+
+        assert event.payload["status"] == "success"
+        assert make_raw_request_mock.call_count == 5
+
+    @patch("include.scripts.weather.triggers.WeatherClient")
+    def test_run_error(self, weather_client_mock: MagicMock) -> None:
+        """Test for run function when too many polls in a row fail."""
+        make_raw_request_mock: MagicMock = (
+            weather_client_mock.return_value.make_raw_request
+        )
+        make_raw_request_mock.side_effect = Exception("error_mock")
+        self.trigger.max_consecutive_failures = 3
+
+        event: TriggerEvent = asyncio.run(get_first_event(self.trigger))
+
+        assert event.payload == {"status": "error", "message": "error_mock"}
+        assert make_raw_request_mock.call_count == 3
@@ -1,14 +1,28 @@
 """Script to test utils for weather API pipeline."""
+import json
+import multiprocessing
 import os
-from typing import Any, Dict, List, Union
+import tempfile
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Tuple, Union
 from unittest import TestCase
 from unittest.mock import MagicMock, call, patch
 
-from airflow.exceptions import AirflowSkipException
+import duckdb
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from airflow.exceptions import AirflowException, AirflowSkipException
+from jinja2 import Template
 
 import include.scripts.weather.utils as utils
 from include.scripts.weather.client import WeatherEndpoints
-from include.scripts.weather.utils import DUCK_DB, NULL_VALUE, SELECTED_STATION_ID
+from include.scripts.weather.utils import (
+    DUCK_DB,
+    NULL_VALUE,
+    SELECTED_STATION_ID,
+    TableMetadata,
+)
 
 
 class TestUtils(TestCase):
@@ -145,8 +159,8 @@ class TestUtils(TestCase):
         )
         expected_response: Dict[str, Union[str, float]] = {
             "station_id": SELECTED_STATION_ID,
-            "latitude": -83.17,
-            "longitude": 30.05,
+            "latitude": 30.05,
+            "longitude": -83.17,
             "observation_timestamp": "2024-08-30T09:20:00+00:00",
             "temperature": 22.39,
             "wind_speed": 0,
@@ -179,8 +193,11 @@ class TestUtils(TestCase):
         assert response.keys() == expected_response.keys()
         assert all(response[key] == expected_response[key] for key in response)
 
+    @patch("include.scripts.weather.utils.bump_load_version")
     @patch("include.scripts.weather.utils.duckdb")
-    def test_load_extracted_data(self, duckdb_mock: MagicMock) -> None:
+    def test_load_extracted_data(
+        self, duckdb_mock: MagicMock, bump_load_version_mock: MagicMock
+    ) -> None:
         """Test for load_extracted_data function."""
         sql_query: str = "SELECT 1 FROM table_mock;"
 
@@ -188,6 +205,205 @@ class TestUtils(TestCase):
 
         duckdb_mock.assert_has_calls([call.connect(DUCK_DB)])
         duckdb_mock.assert_has_calls([call.connect().__enter__().execute(sql_query)])
+        bump_load_version_mock.assert_called_once_with(DUCK_DB)
+
+    def test_get_tables_metadata(self) -> None:
+        """Test for get_tables_metadata function."""
+        response: Tuple[TableMetadata, TableMetadata] = utils.get_tables_metadata(
+            compact_schema=False
+        )
+        assert response == (utils.STATIONS, utils.WEATHER_OBS)
+
+        response = utils.get_tables_metadata(compact_schema=True)
+        assert response == (utils.STATIONS_COMPACT, utils.WEATHER_OBS_COMPACT)
+        assert all("sql/weather/compact/" in table.sql_path for table in response)
+
+    def test_compact_database(self) -> None:
+        """Test for compact_database function."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            database: str = os.path.join(tmp_dir, "duck.db")
+            with duckdb.connect(database) as con:
+                con.execute(
+                    "CREATE TABLE weather_obs (station_id VARCHAR, "
+                    "observation_timestamp TIMESTAMP, temperature DOUBLE)"
+                )
+                con.execute(
+                    "INSERT INTO weather_obs VALUES "
+                    "('B', '2024-08-30 10:00:00', 1.0), "
+                    "('A', '2024-08-30 11:00:00', 2.0), "
+                    "('A', '2024-08-29 10:00:00', 3.0), "
+                    "('A', '2024-08-30 09:00:00', 4.0)"
+                )
+                con.execute("CREATE TABLE stations (station_id VARCHAR PRIMARY KEY)")
+                con.execute("INSERT INTO stations VALUES ('B'), ('A')")
+
+            utils.compact_database(database=database)
+
+            assert not os.path.exists(f"{database}.compacted")
+            with duckdb.connect(database) as con:
+                temperatures: List[Any] = con.execute(
+                    "SELECT temperature FROM weather_obs"
+                ).fetchall()
+                stations: List[Any] = con.execute(
+                    "SELECT station_id FROM stations"
+                ).fetchall()
+
+            assert temperatures == [(3.0,), (4.0,), (2.0,), (1.0,)]
+            assert sorted(stations) == [("A",), ("B",)]
+
+    def test_compact_schema_load(self) -> None:
+        """Test for the load and analytic queries of the compact schema."""
+        sql_folder: str = "include/sql/weather/compact"
+
+        def read_sql(file_name: str, raw_file_path: str = "") -> str:
+            task_instance: MagicMock = MagicMock()
+            task_instance.xcom_pull.return_value = raw_file_path
+            with open(os.path.join(sql_folder, file_name)) as file:
+                return Template(file.read()).render(task_instance=task_instance)
+
+        def load(
+            con: Any, file_name: str, rows: List[Dict[str, Any]], fail: bool = False
+        ) -> None:
+            raw_file_path: str = os.path.join(tmp_dir, "raw.parquet")
+            pd.DataFrame(rows).to_parquet(raw_file_path)
+            sql_query: str = read_sql(file_name, raw_file_path)
+            if fail:
+                # Fail on the last statement of the load.
+                sql_query = sql_query.replace(
+                    "INSERT INTO weather_obs\n", "INSERT INTO missing_table\n"
+                )
+            try:
+                con.execute(sql_query)
+            except duckdb.Error:
+                # Like closing the connection of the failed task.
+                con.execute("ROLLBACK")
+                raise
+
+        def obs(
+            station_id: str, latitude: float, longitude: float, timestamp: str
+        ) -> Dict[str, Any]:
+            return {
+                "station_id": station_id,
+                "latitude": latitude,
+                "longitude": longitude,
+                "observation_timestamp": timestamp,
+                "temperature": 22.391,
+                "wind_speed": 1.0,
+                "humidity": NULL_VALUE,
+            }
+
+        with tempfile.TemporaryDirectory() as tmp_dir, duckdb.connect(
+            os.path.join(tmp_dir, "duck.db")
+        ) as con:
+            for ddl in (
+                "stations_table_ddl.sql",
+                "stations_location_history_table_ddl.sql",
+                "weather_obs_table_ddl.sql",
+            ):
+                con.execute(read_sql(ddl))
+
+            # The upsert keeps the key of known stations.
+            stations: List[Dict[str, str]] = [
+                {
+                    "station_id": "0112W",
+                    "station_name": "Old name",
+                    "station_timezone": "America/New_York",
+                }
+            ]
+            load(con, "load_stations_data.sql", stations)
+            stations = [
+                {**stations[0], "station_name": "Lafayette High School"},
+                {
+                    "station_id": "KTLH",
+                    "station_name": "Tallahassee",
+                    "station_timezone": "America/New_York",
+                },
+            ]
+            load(con, "load_stations_data.sql", stations)
+            station_keys: Dict[str, int] = dict(
+                con.execute("SELECT station_id, station_key FROM stations").fetchall()
+            )
+            assert station_keys["0112W"] == 1
+            assert station_keys["KTLH"] not in (None, 1)
+            assert con.execute(
+                "SELECT station_name FROM stations WHERE station_id = '0112W'"
+            ).fetchall() == [("Lafayette High School",)]
+
+            # 0112W moves in the second batch.
+            load(
+                con,
+                "load_weather_obs_data.sql",
+                [
+                    obs("0112W", 30.05, -83.17, "2024-08-30T09:20:00+00:00"),
+                    obs("0112W", 30.05, -83.17, "2024-08-30T09:40:00+00:00"),
+                    obs("KTLH", 30.39, -84.35, "2024-08-30T09:40:00+00:00"),
+                ],
+            )
+            second_batch: List[Dict[str, Any]] = [
+                obs("0112W", 30.05, -83.17, "2024-08-30T10:20:00+00:00"),
+                obs("0112W", 30.06, -83.2, "2024-08-30T10:40:00+00:00"),
+            ]
+            # A load that fails partway is rolled back, so its retry
+            # doesn't rewrite the history twice.
+            with self.assertRaises(duckdb.Error):
+                load(con, "load_weather_obs_data.sql", second_batch, fail=True)
+            load(con, "load_weather_obs_data.sql", second_batch)
+
+            history: List[Any] = con.execute(
+                "SELECT station_key, CAST(latitude AS DOUBLE), "
+                "CAST(longitude AS DOUBLE), CAST(valid_from AS VARCHAR), "
+                "CAST(valid_to AS VARCHAR) FROM stations_location_history "
+                "ORDER BY station_key, valid_from"
+            ).fetchall()
+            assert history == [
+                (1, 30.05, -83.17, "2024-08-30 09:20:00", "2024-08-30 10:40:00"),
+                (1, 30.06, -83.2, "2024-08-30 10:40:00", None),
+                (station_keys["KTLH"], 30.39, -84.35, "2024-08-30 09:40:00", None),
+            ]
+            assert con.execute(
+                "SELECT CAST(latitude AS DOUBLE), CAST(longitude AS DOUBLE) "
+                "FROM stations WHERE station_id = '0112W'"
+            ).fetchall() == [(30.06, -83.2)]
+            assert (
+                dict(
+                    con.execute(
+                        "SELECT station_id, station_key FROM stations"
+                    ).fetchall()
+                )
+                == station_keys
+            )
+
+            weather_obs: List[Any] = con.execute(
+                "SELECT station_key, CAST(temperature AS DOUBLE) FROM weather_obs"
+            ).fetchall()
+            assert len(weather_obs) == 5
+            assert {row[1] for row in weather_obs} == {22.39}
+
+            # Observations of a station not loaded yet fail the load
+            # instead of being dropped.
+            with self.assertRaises(duckdb.Error):
+                load(
+                    con,
+                    "load_weather_obs_data.sql",
+                    [
+                        obs("0112W", 30.06, -83.2, "2024-08-30T11:20:00+00:00"),
+                        obs("KJAX", 30.49, -81.69, "2024-08-30T11:20:00+00:00"),
+                    ],
+                )
+            assert con.execute("SELECT COUNT(*) FROM weather_obs").fetchone() == (5,)
+
+            for file_name, column in (
+                ("avg_temp_last_week.sql", "average_temperature"),
+                ("max_wind_change_last_week.sql", "max_wind_speed_change"),
+            ):
+                sql_query: str = (
+                    read_sql(file_name)
+                    .replace("current_date()", "DATE '2024-09-01'")
+                    .replace("CURRENT_DATE()", "DATE '2024-09-01'")
+                )
+                result: pd.DataFrame = con.execute(sql_query).df()
+                assert sorted(result["station_id"]) == ["0112W", "KTLH"]
+                assert result[column].notna().all()
 
     @patch("include.scripts.weather.utils.os")
     @patch("include.scripts.weather.utils.pd")
@@ -216,6 +432,24 @@ class TestUtils(TestCase):
         pd_mock.assert_has_calls([call.DataFrame(data)])
         open_mock.assert_has_calls([call(raw_file_path, "wb")])
 
+    @patch("include.scripts.weather.utils.get_raw_file_path")
+    def test_save_table_to_disk(self, get_raw_file_path_mock: MagicMock) -> None:
+        """Test for save_table_to_disk function."""
+        table: pa.Table = pa.table({"field_1": ["value_1", "value_2"]})
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            raw_file_path: str = os.path.join(tmp_dir, "table_mock.parquet")
+            get_raw_file_path_mock.return_value = raw_file_path
+
+            response: str = utils.save_table_to_disk(
+                table=table, table_name="table_mock", ts=self.ts
+            )
+
+            assert response == raw_file_path
+            assert pq.read_table(raw_file_path).equals(table)
+        get_raw_file_path_mock.assert_called_once_with(
+            table_name="table_mock", ts=self.ts
+        )
+
     @patch("include.scripts.weather.utils.WeatherClient")
     @patch("include.scripts.weather.utils.extract_stations_fields")
     @patch("include.scripts.weather.utils.save_data_to_disk")
@@ -316,3 +550,152 @@ class TestUtils(TestCase):
             assert str(error) == "Skipping downstream tasks."
         else:
             raise AssertionError("Function did not raise an AirflowSkipException")
+
+    def test_get_time_window_params(self) -> None:
+        """Test for get_time_window_params function."""
+        response: List[Dict[str, str]] = utils.get_time_window_params(
+            start="2024-08-28T00:00:00+00:00",
+            window=timedelta(days=1),
+            end=datetime(2024, 8, 30, 12, tzinfo=timezone.utc),
+        )
+        expected_response: List[Dict[str, str]] = [
+            {
+                "start": "2024-08-28T00:00:00+00:00",
+                "end": "2024-08-28T23:59:59+00:00",
+            },
+            {
+                "start": "2024-08-29T00:00:00+00:00",
+                "end": "2024-08-29T23:59:59+00:00",
+            },
+            {"start": "2024-08-30T00:00:00+00:00"},
+        ]
+
+        assert response == expected_response
+
+    def test_decode_weather_obs_page(self) -> None:
+        """Test for decode_weather_obs_page function."""
+        content: bytes = json.dumps(
+            {
+                "features": [
+                    {
+                        "geometry": {"coordinates": [-83.17, 30.05]},
+                        "properties": {
+                            "timestamp": "2024-08-30T09:20:00+00:00",
+                            "temperature": {"value": 22.39},
+                            "windSpeed": {"value": 0},
+                            "relativeHumidity": {"value": None},
+                        },
+                    }
+                ]
+            }
+        ).encode()
+
+        response: bytes = utils.decode_weather_obs_page(content)
+        table: pa.Table = pa.ipc.open_stream(response).read_all()
+
+        assert table.schema == utils.WEATHER_OBS_SCHEMA
+        assert table.to_pylist() == [
+            {
+                "station_id": SELECTED_STATION_ID,
+                "latitude": 30.05,
+                "longitude": -83.17,
+                "observation_timestamp": "2024-08-30T09:20:00+00:00",
+                "temperature": 22.39,
+                "wind_speed": 0.0,
+                "humidity": NULL_VALUE,
+            }
+        ]
+
+    @patch("include.scripts.weather.utils.Variable")
+    @patch("include.scripts.weather.utils.WeatherClient")
+    @patch("include.scripts.weather.utils.save_table_to_disk")
+    def test_extract_weather_obs_data_parallel(
+        self,
+        save_table_to_disk_mock: MagicMock,
+        weather_client_mock: MagicMock,
+        variable_mock: MagicMock,
+    ) -> None:
+        """Test for extract_weather_obs_data_parallel function."""
+        raw_file_path: str = "path/raw_file_mock.parquet"
+        save_table_to_disk_mock.return_value = raw_file_path
+
+        def page(timestamps: List[str]) -> bytes:
+            features: List[Dict[str, Any]] = [
+                {
+                    "geometry": {"coordinates": [-83.17, 30.05]},
+                    "properties": {"timestamp": timestamp},
+                }
+                for timestamp in timestamps
+            ]
+            return json.dumps({"features": features}).encode()
+
+        weather_client_mock.return_value.make_raw_request.side_effect = [
+            page(["2024-08-28T10:00:00+00:00", "2024-08-28T09:00:00+00:00"]),
+            page([]),
+            page(["2024-08-30T09:20:00+00:00"]),
+        ]
+        start: str = (datetime.now(timezone.utc) - timedelta(hours=50)).isoformat()
+
+        response: str = utils.extract_weather_obs_data_parallel(
+            ts=self.ts, start=start, workers=2
+        )
+
+        assert response == raw_file_path
+        assert weather_client_mock.return_value.make_raw_request.call_count == 3
+        table: pa.Table = save_table_to_disk_mock.call_args.kwargs["table"]
+        assert table["observation_timestamp"].to_pylist() == [
+            "2024-08-28T09:00:00+00:00",
+            "2024-08-28T10:00:00+00:00",
+            "2024-08-30T09:20:00+00:00",
+        ]
+        variable_mock.set.assert_called_once_with(
+            "weather_obs_last_date", "2024-08-30T09:20:00+00:00"
+        )
+
+        # When there is no new data to ingest
+        weather_client_mock.return_value.make_raw_request.side_effect = None
+        weather_client_mock.return_value.make_raw_request.return_value = page([])
+        try:
+            utils.extract_weather_obs_data_parallel(ts=self.ts, start=start, workers=2)
+        except AirflowSkipException as error:
+            assert str(error) == "Skipping downstream tasks."
+        else:
+            raise AssertionError("Function did not raise an AirflowSkipException")
+
+    @patch("include.scripts.weather.utils.WeatherClient")
+    def test_extract_weather_obs_data_parallel_daemonic(
+        self, weather_client_mock: MagicMock
+    ) -> None:
+        """Test for extract_weather_obs_data_parallel in a daemonic process.
+
+        The LocalExecutor runs the tasks in forks of a daemonic process.
+        """
+        weather_client_mock.return_value.make_raw_request.return_value = b"{}"
+        context: Any = multiprocessing.get_context("fork")
+        receiver: Any
+        sender: Any
+        receiver, sender = context.Pipe(duplex=False)
+
+        def run_task() -> None:
+            if os.fork() == 0:
+                try:
+                    utils.extract_weather_obs_data_parallel(
+                        ts=self.ts, start="2024-08-30T09:00:00+00:00", workers=2
+                    )
+                except Exception as error:
+                    sender.send((type(error), str(error)))
+                else:
+                    sender.send((None, ""))
+                os._exit(0)
+            os.wait()
+
+        process: Any = context.Process(target=run_task, daemon=True)
+        process.start()
+        error_type: Any
+        message: str
+        assert receiver.poll(timeout=30)
+        error_type, message = receiver.recv()
+        process.join()
+
+        assert error_type is AirflowException
+        assert "AIRFLOW__CORE__EXECUTE_TASKS_NEW_PYTHON_INTERPRETER=True" in message